@@ -0,0 +1,132 @@
+"""
+JSON encoding of computed timelines without building and validating pydantic models.
+
+Output is byte-compatible with FastAPI serialization of `VestedEquityValuation`
+and `VestedEquityValuationRun` lists and of `VestedEquityScenarios` through `JSONResponse`:
+Decimals are written as pydantic encodes them, dates in settings.DATE_FORMAT and there
+are no spaces between the items.
+"""
+import json
+import math
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, Iterator, Sequence
+
+from pydantic.json import decimal_encoder
+
+from app.schemas import format_date
+from app.services.scenario_valuation import ScenarioValuationMatrix
+from app.services.vesting_calculator import ValuatedPoint, ValuatedRuns, ValuatedTimeline
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Streamed lines are grouped, so the response isn't sent point by point
+NDJSON_CHUNK_POINTS = 256
+
+
+def encode_valuated_timeline(valuated_timeline: ValuatedTimeline) -> bytes:
+    return _encode_valuated_timeline(valuated_timeline).encode()
+
+
+def encode_valuated_runs(valuated_runs: ValuatedRuns) -> bytes:
+    return (
+        '['
+        + ','.join(
+            f'{{"total_value":{_encode_decimal(total_value)},'
+            f'"start_date":"{format_date(start_date)}","end_date":"{format_date(end_date)}"}}'
+            for start_date, end_date, total_value in zip(*valuated_runs)
+        )
+        + ']'
+    ).encode()
+
+
+def encode_scenario_valuations(
+    scenario_valuations: ScenarioValuationMatrix, percentiles: Sequence[float],
+) -> bytes:
+    """Encode the values matrix with `json` C encoder, as lists of floats at once."""
+    return json.dumps(
+        {
+            'dates': [format_date(date_) for date_ in scenario_valuations.dates],
+            'scenarios': (
+                None
+                if scenario_valuations.total_values is None
+                else scenario_valuations.total_values.tolist()
+            ),
+            'percentiles': [
+                {'percentile': float(percentile), 'total_values': percentile_values}
+                for percentile, percentile_values
+                in zip(percentiles, scenario_valuations.percentile_values.tolist())
+            ],
+        },
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(',', ':'),
+    ).encode()
+
+
+def encode_valuated_timelines(valuated_timelines: dict[str, ValuatedTimeline]) -> bytes:
+    return (
+        '{'
+        + ','.join(
+            f'{json.dumps(holder_id, ensure_ascii=False)}:'
+            f'{_encode_valuated_timeline(valuated_timeline)}'
+            for holder_id, valuated_timeline in valuated_timelines.items()
+        )
+        + '}'
+    ).encode()
+
+
+def iter_ndjson_valuated_timeline(valuated_points: Iterable[ValuatedPoint]) -> Iterator[bytes]:
+    """Encode timeline points as JSON lines, as they are yielded."""
+    return _iter_ndjson_chunks(valuated_points, '{')
+
+
+def iter_ndjson_valuated_timelines(
+    holder_valuated_points: Iterable[tuple[str, Iterable[ValuatedPoint]]],
+) -> Iterator[bytes]:
+    """Encode timeline points of every holder as JSON lines with the holder_id field."""
+    for holder_id, valuated_points in holder_valuated_points:
+        yield from _iter_ndjson_chunks(
+            valuated_points, f'{{"holder_id":{json.dumps(holder_id, ensure_ascii=False)},',
+        )
+
+
+def _iter_ndjson_chunks(
+    valuated_points: Iterable[ValuatedPoint], line_start: str,
+) -> Iterator[bytes]:
+    valuated_points = iter(valuated_points)
+
+    while chunk := ''.join(
+        f'{_encode_valuated_point(date_, total_value, line_start)}\n'
+        for date_, total_value in islice(valuated_points, NDJSON_CHUNK_POINTS)
+    ):
+        yield chunk.encode()
+
+
+def _encode_valuated_timeline(valuated_timeline: ValuatedTimeline) -> str:
+    return (
+        '['
+        + ','.join(
+            _encode_valuated_point(date_, total_value)
+            for date_, total_value in zip(valuated_timeline.dates, valuated_timeline.total_values)
+        )
+        + ']'
+    )
+
+
+def _encode_valuated_point(date_: date, total_value: Decimal, line_start: str = '{') -> str:
+    return (
+        f'{line_start}"total_value":{_encode_decimal(total_value)},'
+        f'"date":"{format_date(date_)}"}}'
+    )
+
+
+def _encode_decimal(value: Decimal) -> str:
+    # Decimals without fractional exponent are encoded as int, others as float
+    encoded_value = decimal_encoder(value)
+
+    if isinstance(encoded_value, float) and not math.isfinite(encoded_value):
+        raise ValueError(f'Out of range float values are not JSON compliant: {value}')
+
+    return repr(encoded_value)
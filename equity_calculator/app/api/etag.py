@@ -0,0 +1,82 @@
+import json
+from hashlib import sha256
+from typing import Any
+
+from fastapi import Depends, HTTPException, Request, status
+
+# Order of grants doesn't affect the computation result, unless they are parallel
+# arrays of the columnar payload. Valuations are ordered, the last one of the same
+# date sets the price.
+_UNORDERED_PAYLOAD_KEYS = frozenset({'option_grants'})
+
+
+async def get_payload_digest(request: Request) -> str:
+    """
+        Get hash of the request path and its normalized payload, the same
+        for payloads of the same computation inputs.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        # Leave reporting of the malformed payload to the validation
+        payload = (await request.body()).decode(errors='replace')
+
+    canonical_payload = json.dumps(
+        [request.url.path, _normalize_payload(payload)],
+        sort_keys=True,
+        separators=(',', ':'),
+    )
+    return sha256(canonical_payload.encode()).hexdigest()
+
+
+async def get_payload_etag(
+    request: Request, payload_digest: str = Depends(get_payload_digest),
+) -> str:
+    """
+        Get ETag as a hash of the payload digest, query and accepted media type.
+
+        Respond with 304 straight away when it matches the If-None-Match header,
+        so neither the payload validation nor the computation is done.
+    """
+    canonical_request = json.dumps(
+        [
+            payload_digest,
+            sorted(request.query_params.multi_items()),
+            request.headers.get('accept'),
+        ],
+        separators=(',', ':'),
+    )
+    etag = f'"{sha256(canonical_request.encode()).hexdigest()}"'
+
+    if _etag_matches(etag, request.headers.get('if-none-match')):
+        raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    return etag
+
+
+def _normalize_payload(payload: Any, is_unordered: bool = False) -> Any:
+    if isinstance(payload, dict):
+        return {
+            key: _normalize_payload(value, key in _UNORDERED_PAYLOAD_KEYS)
+            for key, value in payload.items()
+        }
+
+    if isinstance(payload, list):
+        items = [_normalize_payload(item) for item in payload]
+
+        if is_unordered:
+            items.sort(key=lambda item: json.dumps(item, sort_keys=True))
+
+        return items
+
+    return payload
+
+
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+
+    return any(
+        client_etag.strip().removeprefix('W/') in (etag, '*')
+        for client_etag in if_none_match.split(',')
+    )
@@ -0,0 +1,89 @@
+import base64
+import hmac
+import json
+from hashlib import sha256
+from typing import NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Query, Request, status
+
+from app.api.etag import get_payload_digest
+from app.core.config import settings
+from app.services.vesting_calculator import TimelineCursor
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# Hex digits of the cursor signature kept in the token
+_SIGNATURE_LENGTH = 32
+
+
+class TimelinePageRequest(NamedTuple):
+    page_size: int
+    cursor: Optional[TimelineCursor]
+    # Cursors are only valid for the timeline of the same payload and window
+    timeline_digest: str
+
+
+def get_timeline_page_request(
+    request: Request,
+    page_size: int | None = Query(None, gt=0),
+    cursor: str | None = Query(None),
+    payload_digest: str = Depends(get_payload_digest),
+) -> Optional[TimelinePageRequest]:
+    """
+        Get the requested timeline page when the timeline is paginated, page size
+        is limited by settings.TIMELINE_MAX_PAGE_SIZE.
+    """
+    if page_size is None and cursor is None:
+        return None
+
+    timeline_digest = json.dumps([
+        payload_digest,
+        request.query_params.get('from_date'),
+        request.query_params.get('to_date'),
+    ])
+
+    return TimelinePageRequest(
+        min(page_size or settings.TIMELINE_PAGE_SIZE, settings.TIMELINE_MAX_PAGE_SIZE),
+        None if cursor is None else decode_cursor(cursor, timeline_digest),
+        timeline_digest,
+    )
+
+
+def encode_cursor(cursor: TimelineCursor, timeline_digest: str) -> str:
+    """
+        Encode the cursor as an opaque URL-safe token, signed along with the digest
+        of its timeline, so it can be neither altered nor used for another timeline.
+    """
+    token_fields = [*cursor, _sign_cursor(cursor, timeline_digest)]
+    return base64.urlsafe_b64encode(
+        json.dumps(token_fields, separators=(',', ':')).encode()
+    ).decode()
+
+
+def decode_cursor(token: str, timeline_digest: str) -> TimelineCursor:
+    try:
+        token_fields = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except ValueError:
+        token_fields = None
+
+    if not (
+        isinstance(token_fields, list)
+        and len(token_fields) == len(TimelineCursor._fields) + 1
+        and all(type(cursor_field) is int for cursor_field in token_fields[:-1])
+        and isinstance(token_fields[-1], str)
+    ):
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, 'Invalid cursor')
+
+    cursor = TimelineCursor(*token_fields[:-1])
+
+    if not hmac.compare_digest(token_fields[-1], _sign_cursor(cursor, timeline_digest)):
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, 'Invalid cursor')
+
+    return cursor
+
+
+def _sign_cursor(cursor: TimelineCursor, timeline_digest: str) -> str:
+    message = json.dumps([*cursor, timeline_digest], separators=(',', ':'))
+    return hmac.new(
+        settings.CURSOR_SECRET_KEY.encode(), message.encode(), sha256,
+    ).hexdigest()[:_SIGNATURE_LENGTH]
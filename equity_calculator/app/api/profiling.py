@@ -0,0 +1,29 @@
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_PARAM = 'profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+_ENABLING_VALUES = frozenset({'1', 'true', 'yes', 'on'})
+
+
+async def get_profiled_payload(request: Request) -> Optional[bytes]:
+    """
+        Get the raw request payload when the request asks to be profiled,
+        so its parsing is profiled along with the computation.
+    """
+    if not settings.PROFILING_ENABLED:
+        return None
+
+    profile_flag = request.headers.get(PROFILE_HEADER) or request.query_params.get(
+        PROFILE_QUERY_PARAM
+    )
+
+    if profile_flag is None or profile_flag.lower() not in _ENABLING_VALUES:
+        return None
+
+    return await request.body()
@@ -0,0 +1,82 @@
+from typing import Callable
+
+from starlette.routing import BaseRoute, Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (request_duration_seconds, requests_in_flight, requests_total,
+                              stage_duration_seconds)
+from app.core.timing import record_stage_timings
+
+# Route label of the requests not matched by any route, so their paths don't make new series
+UNMATCHED_ROUTE = 'unmatched'
+
+Endpoint = Callable
+
+
+class RequestMetricsMiddleware:
+    """
+        Collect latencies of the requests and their stages into `core.metrics`.
+
+        Routes are labeled with the path template of the matched route rather than
+        the request path, so path parameters don't make new series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # Path templates of the routes by their endpoints, filled on the first requests
+        self._route_paths: dict[Endpoint, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status_code(message: Message) -> None:
+            nonlocal status_code
+
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+
+            await send(message)
+
+        requests_in_flight.inc()
+
+        with record_stage_timings() as stage_timings:
+            try:
+                await self.app(scope, receive, send_with_status_code)
+            finally:
+                requests_in_flight.dec()
+
+                route = self._get_route_path(scope)
+                method = scope['method']
+
+                request_duration_seconds.observe(stage_timings.elapsed, method=method, route=route)
+                requests_total.inc(method=method, route=route, status_code=str(status_code))
+
+                for stage, seconds in stage_timings.stages.items():
+                    stage_duration_seconds.observe(seconds, stage=stage)
+
+    def _get_route_path(self, scope: Scope) -> str:
+        # Router sets the endpoint to the scope of the matched requests
+        endpoint = scope.get('endpoint')
+
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+
+        route_path = self._route_paths.get(endpoint)
+
+        if route_path is None:
+            route_path = self._route_paths[endpoint] = _find_route_path(
+                scope['app'].routes, endpoint,
+            )
+
+        return route_path
+
+
+def _find_route_path(routes: list[BaseRoute], endpoint: Endpoint) -> str:
+    return next(
+        (route.path for route in routes if isinstance(route, Route) and route.endpoint is endpoint),
+        UNMATCHED_ROUTE,
+    )
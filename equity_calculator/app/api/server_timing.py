@@ -0,0 +1,71 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.timing import StageTimings, record_stage_timings
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+        Report timings of the request stages in the Server-Timing header
+        and log them with the `stage_durations_ms` field.
+
+        Stages finished after the response start (of the streamed responses)
+        are only logged.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        with record_stage_timings() as stage_timings:
+            async def send_with_server_timing(message: Message) -> None:
+                nonlocal status_code
+
+                if message['type'] == 'http.response.start':
+                    status_code = message['status']
+                    MutableHeaders(scope=message).append(
+                        'Server-Timing', format_server_timing(stage_timings),
+                    )
+
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_server_timing)
+            finally:
+                _log_stage_timings(scope, status_code, stage_timings)
+
+
+def format_server_timing(stage_timings: StageTimings) -> str:
+    return ', '.join(
+        f'{stage};dur={seconds * 1000:.3f}'
+        for stage, seconds in [*stage_timings.stages.items(), ('total', stage_timings.elapsed)]
+    )
+
+
+def _log_stage_timings(scope: Scope, status_code: int, stage_timings: StageTimings) -> None:
+    duration_ms = round(stage_timings.elapsed * 1000, 3)
+    stage_durations_ms = {
+        stage: round(seconds * 1000, 3) for stage, seconds in stage_timings.stages.items()
+    }
+
+    logger.info(
+        '%s %s %s %.3fms %s',
+        scope['method'], scope['path'], status_code, duration_ms, stage_durations_ms,
+        extra={
+            'method': scope['method'],
+            'path': scope['path'],
+            'status_code': status_code,
+            'duration_ms': duration_ms,
+            'stage_durations_ms': stage_durations_ms,
+        },
+    )
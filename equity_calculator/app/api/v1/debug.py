@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.services.cache import profile_report_cache
+
+router = APIRouter()
+
+
+@router.get('/profiles/{profile_id}')
+def get_profile_report(profile_id: str) -> Any:
+    report = profile_report_cache.get(profile_id)
+
+    if report is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, 'Profile report is not found')
+
+    return report
@@ -1,6 +1,15 @@
 from typing import Any
 
+import anyio.to_thread
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import (cache_hit_ratio, cache_lookups, cache_size, registry,
+                              threadpool_queue_depth, threadpool_threads)
+from app.services.cache import get_caches_stats
+
+# Version of the Prometheus text exposition format, charset is added by the response
+PROMETHEUS_MEDIA_TYPE = 'text/plain; version=0.0.4'
 
 router = APIRouter()
 
@@ -8,3 +17,33 @@ router = APIRouter()
 @router.get('/ping')
 def ping() -> Any:
     return
+
+
+@router.get('/caches')
+def caches() -> Any:
+    return {
+        cache_name: {**cache_stats._asdict(), 'hit_ratio': cache_stats.hit_ratio}
+        for cache_name, cache_stats in get_caches_stats().items()
+    }
+
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def metrics() -> Any:
+    """
+        Metrics in the Prometheus text format, gauges of the pools and caches are set
+        at the scrape time. Async endpoint, so the scrape doesn't wait for a free thread.
+    """
+    threadpool_stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    threadpool_threads.set(threadpool_stats.borrowed_tokens, state='busy')
+    threadpool_threads.set(
+        threadpool_stats.total_tokens - threadpool_stats.borrowed_tokens, state='idle',
+    )
+    threadpool_queue_depth.set(threadpool_stats.tasks_waiting)
+
+    for cache_name, cache_stats in get_caches_stats().items():
+        cache_lookups.set(cache_stats.hits, cache=cache_name, result='hit')
+        cache_lookups.set(cache_stats.misses, cache=cache_name, result='miss')
+        cache_hit_ratio.set(cache_stats.hit_ratio, cache=cache_name)
+        cache_size.set(cache_stats.size, cache=cache_name)
+
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -1,27 +1,474 @@
-from typing import Any
+from typing import Any, Callable, Sequence
 
-from fastapi import APIRouter
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, root_validator, validator
 
-from app.schemas import CompanyValuation, OptionGrant, VestedEquityValuation
-from app.services.vesting_calculator import get_valuated_vesting_schedule
+from app.api.encoders import (NDJSON_MEDIA_TYPE, encode_scenario_valuations,
+                              encode_valuated_runs, encode_valuated_timeline,
+                              encode_valuated_timelines, iter_ndjson_valuated_timeline,
+                              iter_ndjson_valuated_timelines)
+from app.api.etag import get_payload_etag
+from app.api.pagination import (NEXT_CURSOR_HEADER, TimelinePageRequest, encode_cursor,
+                                get_timeline_page_request)
+from app.api.profiling import PROFILE_ID_HEADER, get_profiled_payload
+from app.core.metrics import request_input_size
+from app.core.timing import record_elapsed_stage, timed_stage
+from app.schemas import (AnyCompanyValuation, AnyOptionGrant, CompanyValuation,
+                         CompanyValuationColumns, FormattedDate, OptionGrant,
+                         OptionGrantColumns, PricePaths, VestedEquityScenarios,
+                         VestedEquityValuation, VestedEquityValuationRun)
+from app.services.cache import result_cache
+from app.services.process_pool import run_valuated_timeline, run_valuated_timelines
+from app.services.profiling import profile_computation
+from app.services.scenario_valuation import get_scenario_valuations
+from app.services.vectorized_vesting_calculator import Granularity
+from app.services.vesting_calculator import (TimelineWindow, get_valuated_runs,
+                                             get_valuated_timeline, get_valuated_timeline_page,
+                                             get_vested_values_asof, iter_valuated_timeline,
+                                             iter_valuated_timelines)
 
 router = APIRouter()
 
+GrantsAndValuations = tuple[Sequence[AnyOptionGrant], Sequence[AnyCompanyValuation]]
+
 
 class EquityValuationRequest(BaseModel):
     option_grants: list[OptionGrant] = Field(..., min_items=1)
     company_valuations: list[CompanyValuation] = Field(..., min_items=1)
 
 
+class AsOfEquityValuationRequest(EquityValuationRequest):
+    query_dates: list[FormattedDate] = Field(..., min_items=1)
+
+
+class ColumnarEquityValuationRequest(BaseModel):
+    option_grants: OptionGrantColumns
+    company_valuations: CompanyValuationColumns
+
+
+class ScenarioValuationRequest(BaseModel):
+    option_grants: list[OptionGrant] = Field(..., min_items=1)
+    valuation_dates: list[FormattedDate] = Field(..., min_items=1)
+    # Scenarios × valuation dates, i-th price of a path is of i-th valuation date
+    price_paths: PricePaths
+    percentiles: list[float] = []
+    # Values of every scenario take scenarios × points floats, percentiles are usually enough
+    include_scenarios: bool = False
+
+    @validator('percentiles', each_item=True)
+    def check_percentile_within_0_and_100(cls, value: float) -> float:
+        if not 0 <= value <= 100:
+            raise ValueError('Must be within 0 and 100')
+
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def check_price_paths_have_price_for_every_valuation_date(cls, values: dict) -> dict:
+        if values['price_paths'].shape[1] != len(values['valuation_dates']):
+            raise ValueError('Every price path must have a price for every valuation date')
+
+        return values
+
+
+class BatchEquityValuationRequest(BaseModel):
+    holder_option_grants: dict[str, list[OptionGrant]]
+    company_valuations: list[CompanyValuation] = Field(..., min_items=1)
+
+    @validator('holder_option_grants')
+    def check_every_holder_has_grants(
+        cls, value: dict[str, list[OptionGrant]],
+    ) -> dict[str, list[OptionGrant]]:
+        if not value:
+            raise ValueError('At least one holder must be provided')
+
+        if not all(value.values()):
+            raise ValueError('At least one grant must be provided for every holder')
+
+        return value
+
+
+def get_timeline_window(
+    from_date: FormattedDate | None = Query(None),
+    to_date: FormattedDate | None = Query(None),
+) -> TimelineWindow | None:
+    """Get the window of the timeline points to respond with, when any of its bounds is set."""
+    if from_date is None and to_date is None:
+        return None
+
+    if from_date is not None and to_date is not None and from_date > to_date:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY, 'from_date must not be after to_date',
+        )
+
+    return TimelineWindow(from_date, to_date)
+
+
 @router.post(
     '/vested_value',
-    response_model=list[VestedEquityValuation],
+    response_model=list[VestedEquityValuation] | list[VestedEquityValuationRun],
 )
 def calculate_vested_value_timeline(
     options_info: EquityValuationRequest,
+    etag: str = Depends(get_payload_etag),
+    accept: str | None = Header(None),
+    window: TimelineWindow | None = Depends(get_timeline_window),
+    granularity: Granularity = Query('monthly'),
+    compact: bool = Query(False),
+    page: TimelinePageRequest | None = Depends(get_timeline_page_request),
+    profiled_payload: bytes | None = Depends(get_profiled_payload),
+) -> Any:
+    if profiled_payload is not None:
+        _check_profiled_timeline_format(accept, page)
+        return _respond_profiled_valuated_timeline(
+            _parse_valuation_request, profiled_payload, etag, window, granularity, compact,
+        )
+
+    return _respond_valuation_request(
+        options_info.option_grants, options_info.company_valuations,
+        etag, accept, window, granularity, compact, page,
+    )
+
+
+@router.post(
+    '/vested_value/columnar',
+    response_model=list[VestedEquityValuation] | list[VestedEquityValuationRun],
+)
+def calculate_vested_value_timeline_from_columns(
+    options_info: ColumnarEquityValuationRequest,
+    etag: str = Depends(get_payload_etag),
+    accept: str | None = Header(None),
+    window: TimelineWindow | None = Depends(get_timeline_window),
+    granularity: Granularity = Query('monthly'),
+    compact: bool = Query(False),
+    page: TimelinePageRequest | None = Depends(get_timeline_page_request),
+    profiled_payload: bytes | None = Depends(get_profiled_payload),
+) -> Any:
+    if profiled_payload is not None:
+        _check_profiled_timeline_format(accept, page)
+        return _respond_profiled_valuated_timeline(
+            _parse_columnar_valuation_request, profiled_payload, etag, window, granularity, compact,
+        )
+
+    return _respond_valuation_request(
+        options_info.option_grants.to_option_grants(),
+        options_info.company_valuations.to_company_valuations(),
+        etag, accept, window, granularity, compact, page,
+    )
+
+
+@router.post(
+    '/vested_value/asof',
+    response_model=list[VestedEquityValuation],
+)
+def calculate_vested_value_asof(
+    options_info: AsOfEquityValuationRequest,
+    etag: str = Depends(get_payload_etag),
+) -> Any:
+    """
+        Get the vested equity value on every query date, in the order of the dates.
+    """
+    record_elapsed_stage('parse')
+    request_input_size.observe(len(options_info.option_grants), input='grants')
+    request_input_size.observe(len(options_info.company_valuations), input='valuations')
+
+    content = result_cache.get(etag)
+
+    if content is None:
+        try:
+            valuated_dates = get_vested_values_asof(
+                options_info.option_grants,
+                options_info.company_valuations,
+                options_info.query_dates,
+            )
+        except ValueError as e:
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+
+        with timed_stage('encoding'):
+            content = encode_valuated_timeline(valuated_dates)
+
+        result_cache.set(etag, content)
+
+    return Response(content, media_type='application/json', headers={'ETag': etag})
+
+
+@router.post(
+    '/vested_value/scenarios',
+    response_model=VestedEquityScenarios,
+)
+def calculate_vested_value_scenarios(
+    options_info: ScenarioValuationRequest,
+    window: TimelineWindow | None = Depends(get_timeline_window),
+    granularity: Granularity = Query('monthly'),
+) -> Any:
+    """
+        Get the vested equity value timeline under every price path scenario
+        and the requested percentiles of the values over the scenarios.
+
+        Responses are neither tagged nor cached, hashing the price paths
+        would cost about as much as their valuation.
+    """
+    record_elapsed_stage('parse')
+    request_input_size.observe(len(options_info.option_grants), input='grants')
+    request_input_size.observe(len(options_info.valuation_dates), input='valuations')
+    request_input_size.observe(len(options_info.price_paths), input='scenarios')
+
+    try:
+        scenario_valuations = get_scenario_valuations(
+            options_info.option_grants,
+            options_info.valuation_dates,
+            options_info.price_paths,
+            options_info.percentiles,
+            window,
+            granularity,
+            options_info.include_scenarios,
+        )
+    except ValueError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+
+    request_input_size.observe(len(scenario_valuations.dates), input='timeline_points')
+
+    with timed_stage('encoding'):
+        content = encode_scenario_valuations(scenario_valuations, options_info.percentiles)
+
+    return Response(content, media_type='application/json')
+
+
+@router.post(
+    '/vested_value/batch',
+    response_model=dict[str, list[VestedEquityValuation]],
+)
+def calculate_vested_value_timelines(
+    options_info: BatchEquityValuationRequest,
+    accept: str | None = Header(None),
 ) -> Any:
-    return get_valuated_vesting_schedule(
-        options_info.option_grants,
-        options_info.company_valuations
+    record_elapsed_stage('parse')
+    request_input_size.observe(
+        sum(map(len, options_info.holder_option_grants.values())), input='grants',
+    )
+    request_input_size.observe(len(options_info.company_valuations), input='valuations')
+
+    if _accepts_ndjson(accept):
+        # Inputs are checked before the generator is returned, so errors are not streamed
+        try:
+            holder_valuated_points = iter_valuated_timelines(
+                options_info.holder_option_grants,
+                options_info.company_valuations
+            )
+        except ValueError as e:
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+
+        return StreamingResponse(
+            iter_ndjson_valuated_timelines(holder_valuated_points),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    try:
+        valuated_timelines = run_valuated_timelines(
+            options_info.holder_option_grants,
+            options_info.company_valuations
+        )
+    except ValueError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+
+    request_input_size.observe(
+        sum(len(valuated_timeline.dates) for valuated_timeline in valuated_timelines.values()),
+        input='timeline_points',
     )
+
+    with timed_stage('encoding'):
+        content = encode_valuated_timelines(valuated_timelines)
+
+    return Response(content, media_type='application/json')
+
+
+def _respond_valuation_request(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    etag: str,
+    accept: str | None,
+    window: TimelineWindow | None,
+    granularity: Granularity,
+    compact: bool,
+    page: TimelinePageRequest | None,
+) -> Response:
+    """Respond with the timeline page, runs or the whole timeline as requested."""
+    record_elapsed_stage('parse')
+    request_input_size.observe(len(option_grants), input='grants')
+    request_input_size.observe(len(company_valuations), input='valuations')
+
+    if page is not None:
+        _check_paginated_timeline_format(granularity, compact)
+        return _respond_valuated_timeline_page(
+            option_grants, company_valuations, etag, window, page,
+        )
+
+    if compact:
+        return _respond_valuated_runs(
+            option_grants, company_valuations, etag, window, granularity,
+        )
+
+    return _respond_valuated_timeline(
+        option_grants, company_valuations, etag, accept, window, granularity,
+    )
+
+
+def _respond_valuated_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    etag: str,
+    accept: str | None,
+    window: TimelineWindow | None,
+    granularity: Granularity,
+) -> Response:
+    if _accepts_ndjson(accept):
+        return StreamingResponse(
+            iter_ndjson_valuated_timeline(
+                iter_valuated_timeline(option_grants, company_valuations, window, granularity)
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={'ETag': etag},
+        )
+
+    # Cache keeps the encoded response, so a hit skips the serialization as well
+    content = result_cache.get(etag)
+
+    if content is None:
+        valuated_timeline = run_valuated_timeline(
+            option_grants, company_valuations, window, granularity,
+        )
+        request_input_size.observe(len(valuated_timeline.dates), input='timeline_points')
+
+        with timed_stage('encoding'):
+            content = encode_valuated_timeline(valuated_timeline)
+
+        result_cache.set(etag, content)
+
+    return Response(content, media_type='application/json', headers={'ETag': etag})
+
+
+def _respond_valuated_runs(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    etag: str,
+    window: TimelineWindow | None,
+    granularity: Granularity,
+) -> Response:
+    """
+        Respond with a JSON array of `VestedEquityValuationRun`, points of the same
+        total value are collapsed into runs from their start to end dates.
+    """
+    content = result_cache.get(etag)
+
+    if content is None:
+        valuated_runs = get_valuated_runs(
+            option_grants, company_valuations, window, granularity,
+        )
+        request_input_size.observe(len(valuated_runs.start_dates), input='timeline_points')
+
+        with timed_stage('encoding'):
+            content = encode_valuated_runs(valuated_runs)
+
+        result_cache.set(etag, content)
+
+    return Response(content, media_type='application/json', headers={'ETag': etag})
+
+
+def _respond_valuated_timeline_page(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    etag: str,
+    window: TimelineWindow | None,
+    page: TimelinePageRequest,
+) -> Response:
+    """
+        Respond with a JSON array of the page points, the cursor of the next page
+        is in the X-Next-Cursor header unless the page is the last one.
+    """
+    try:
+        valuated_timeline, next_cursor = get_valuated_timeline_page(
+            option_grants, company_valuations, page.page_size, page.cursor, window,
+        )
+    except ValueError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+
+    request_input_size.observe(len(valuated_timeline.dates), input='timeline_points')
+
+    with timed_stage('encoding'):
+        content = encode_valuated_timeline(valuated_timeline)
+
+    headers = {'ETag': etag}
+
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(next_cursor, page.timeline_digest)
+
+    return Response(content, media_type='application/json', headers=headers)
+
+
+def _respond_profiled_valuated_timeline(
+    parse_payload: Callable[[bytes], GrantsAndValuations],
+    payload: bytes,
+    etag: str,
+    window: TimelineWindow | None,
+    granularity: Granularity,
+    compact: bool,
+) -> Response:
+    """
+        Parse the payload again and compute the timeline or its runs in-process, bypassing
+        the result cache, under the profilers. Report id is returned in the X-Profile-Id header.
+    """
+    with profile_computation() as profile_report:
+        option_grants, company_valuations = parse_payload(payload)
+        content = (
+            encode_valuated_runs(
+                get_valuated_runs(option_grants, company_valuations, window, granularity)
+            )
+            if compact
+            else encode_valuated_timeline(
+                get_valuated_timeline(option_grants, company_valuations, window, granularity)
+            )
+        )
+
+    return Response(
+        content,
+        media_type='application/json',
+        headers={'ETag': etag, PROFILE_ID_HEADER: profile_report['id']},
+    )
+
+
+def _parse_valuation_request(payload: bytes) -> GrantsAndValuations:
+    options_info = EquityValuationRequest.parse_raw(payload)
+    return options_info.option_grants, options_info.company_valuations
+
+
+def _parse_columnar_valuation_request(payload: bytes) -> GrantsAndValuations:
+    options_info = ColumnarEquityValuationRequest.parse_raw(payload)
+    return (
+        options_info.option_grants.to_option_grants(),
+        options_info.company_valuations.to_company_valuations(),
+    )
+
+
+def _check_profiled_timeline_format(
+    accept: str | None, page: TimelinePageRequest | None,
+) -> None:
+    # Profiled response is computed and encoded at once within the profilers
+    if page is not None or _accepts_ndjson(accept):
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            'Profiled timelines can be neither paginated nor streamed',
+        )
+
+
+def _check_paginated_timeline_format(granularity: Granularity, compact: bool) -> None:
+    # Cursor positions are points of the monthly timeline
+    if granularity != 'monthly' or compact:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            'Only monthly timelines of points can be paginated',
+        )
+
+
+def _accepts_ndjson(accept: str | None) -> bool:
+    """Stream JSON lines when client asks for them, JSON array is the default."""
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
@@ -1,4 +1,7 @@
-from pydantic import BaseSettings
+import secrets
+from typing import Literal
+
+from pydantic import BaseSettings, Field
 
 
 class Settings(BaseSettings):
@@ -6,6 +9,48 @@ class Settings(BaseSettings):
     API_V1_STR = '/api/v1'
 
     DATE_FORMAT = '%d-%m-%Y'
+    # Recently parsed and formatted dates, cap tables repeat the same few dates a lot
+    DATE_CACHE_SIZE: int = 4096
+
+    # `numpy` engine pays off for requests with thousands of grants
+    VESTING_ENGINE: Literal['python', 'numpy'] = 'python'
+
+    # Requests costlier than grants × months threshold are computed in the pool of
+    # PROCESS_POOL_SIZE worker processes, the pool is disabled when the size is 0
+    PROCESS_POOL_SIZE: int = 0
+    PROCESS_POOL_COST_THRESHOLD: int = 100_000
+
+    # Encoded responses are cached by the request payload hash up to the total size
+    # in bytes, larger responses are not cached, size 0 disables the cache
+    RESULT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    RESULT_CACHE_TTL_SECONDS: float = 300
+
+    # Timelines are paginated when `page_size` or `cursor` query param is set,
+    # pages are of the default size unless requested and of the max size at most
+    TIMELINE_PAGE_SIZE: int = 1000
+    TIMELINE_MAX_PAGE_SIZE: int = 10_000
+    # Key of the page cursors signatures, random unless set, so API processes
+    # behind the same balancer must share it for their cursors to be valid
+    CURSOR_SECRET_KEY: str = Field(default_factory=lambda: secrets.token_hex(32))
+
+    # Price paths of a scenario valuation request and their values on the timeline points,
+    # the float64 values matrix takes scenarios × timeline points × 8 bytes
+    SCENARIO_MAX_COUNT: int = 100_000
+    SCENARIO_MAX_VALUES: int = 10_000_000
+
+    # Vest events shapes shared by grants with the same quantity, cliff and duration,
+    # looked up for every grant, so it is sized for the grants of the recent requests
+    VESTING_TEMPLATE_CACHE_SIZE: int = 10_000
+
+    # Timings of the request stages in the Server-Timing header and logs
+    SERVER_TIMING_ENABLED: bool = False
+    # Latencies of the requests and their stages in /health/metrics
+    METRICS_ENABLED: bool = True
+
+    # Requests with the X-Profile header or `profile` query param are profiled
+    # with cProfile and tracemalloc, reports are kept for /debug/profiles
+    PROFILING_ENABLED: bool = False
+    PROFILE_REPORT_CACHE_SIZE: int = 100
 
     CONTACT_NAME = 'Sergey Buchko'
     CONTACT_EMAIL = 'cep.buch@gmail.com'
@@ -0,0 +1,243 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Values are kept in memory of the process, so nothing but a scrape
+of the metrics endpoint is needed to collect them.
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from math import inf
+from threading import Lock
+from typing import Iterator, Sequence, TypeVar
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+M = TypeVar('M', bound='Metric')
+
+# Latencies in seconds, from a cached response to a huge computation
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Sizes of the request inputs and outputs
+SIZE_BUCKETS = (1, 10, 100, 1000, 10_000, 100_000, 1_000_000)
+
+
+class Metric(ABC):
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        ...
+
+    def render(self) -> str:
+        lines = [
+            f'# HELP {self.name} {_escape_help(self.documentation)}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        lines.extend(
+            f'{sample_name}{_format_labels(labels)} {_format_value(value)}'
+            for sample_name, labels, value in self.samples()
+        )
+        return '\n'.join(lines)
+
+    def _get_label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f'{self.name} expects labels {self.label_names}, got {tuple(labels)}')
+
+        return tuple(str(labels[label_name]) for label_name in self.label_names)
+
+    def _get_labels(self, label_values: LabelValues) -> dict[str, str]:
+        return dict(zip(self.label_names, label_values))
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        # Metric without labels is exposed from the start
+        self._values: dict[LabelValues, float] = {} if self.label_names else {(): 0}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        label_values = self._get_label_values(labels)
+
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+
+        for label_values, value in values:
+            yield self.name, self._get_labels(label_values), value
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        label_values = self._get_label_values(labels)
+
+        with self._lock:
+            self._values[label_values] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Non-cumulative counts of every bucket and +Inf, sum of the observed values
+        self._bucket_counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        label_values = self._get_label_values(labels)
+        bucket_idx = bisect_left(self.buckets, value)
+
+        with self._lock:
+            bucket_counts = self._bucket_counts.get(label_values)
+
+            if bucket_counts is None:
+                bucket_counts = self._bucket_counts[label_values] = [0] * (len(self.buckets) + 1)
+
+            bucket_counts[bucket_idx] += 1
+            self._sums[label_values] = self._sums.get(label_values, 0) + value
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            histograms = [
+                (label_values, list(bucket_counts), self._sums[label_values])
+                for label_values, bucket_counts in self._bucket_counts.items()
+            ]
+
+        for label_values, bucket_counts, values_sum in histograms:
+            labels = self._get_labels(label_values)
+            cumulative_count = 0
+
+            for upper_bound, bucket_count in zip((*self.buckets, inf), bucket_counts):
+                cumulative_count += bucket_count
+                yield (
+                    f'{self.name}_bucket',
+                    {**labels, 'le': _format_value(upper_bound)},
+                    cumulative_count,
+                )
+
+            yield f'{self.name}_sum', labels, values_sum
+            yield f'{self.name}_count', labels, cumulative_count
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return ''.join(f'{metric.render()}\n' for metric in self._metrics.values())
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ''
+
+    return '{' + ','.join(
+        f'{label}="{_escape_label_value(value)}"' for label, value in labels.items()
+    ) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == inf:
+        return '+Inf'
+
+    if value == -inf:
+        return '-Inf'
+
+    return repr(value)
+
+
+def _escape_help(documentation: str) -> str:
+    return documentation.replace('\\', r'\\').replace('\n', r'\n')
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+registry = MetricsRegistry()
+
+request_duration_seconds = registry.register(Histogram(
+    'equity_calculator_request_duration_seconds',
+    'Duration of the HTTP requests.',
+    ('method', 'route'),
+))
+requests_total = registry.register(Counter(
+    'equity_calculator_requests_total',
+    'HTTP requests by the response status.',
+    ('method', 'route', 'status_code'),
+))
+requests_in_flight = registry.register(Gauge(
+    'equity_calculator_requests_in_flight',
+    'HTTP requests being processed.',
+))
+stage_duration_seconds = registry.register(Histogram(
+    'equity_calculator_stage_duration_seconds',
+    'Duration of the request computation stages.',
+    ('stage',),
+))
+request_input_size = registry.register(Histogram(
+    'equity_calculator_request_input_size',
+    'Numbers of grants, valuations and scenarios in the requests and of the timeline points.',
+    ('input',),
+    buckets=SIZE_BUCKETS,
+))
+threadpool_threads = registry.register(Gauge(
+    'equity_calculator_threadpool_threads',
+    'Threads of the request threadpool by their state.',
+    ('state',),
+))
+threadpool_queue_depth = registry.register(Gauge(
+    'equity_calculator_threadpool_queue_depth',
+    'Requests waiting for a free thread of the threadpool.',
+))
+process_pool_queue_depth = registry.register(Gauge(
+    'equity_calculator_process_pool_queue_depth',
+    'Computations submitted to the process pool and not finished yet.',
+))
+# Cache stats are reset with the caches, so they are gauges rather than counters
+cache_lookups = registry.register(Gauge(
+    'equity_calculator_cache_lookups',
+    'Lookups of the in-process caches by their result.',
+    ('cache', 'result'),
+))
+cache_hit_ratio = registry.register(Gauge(
+    'equity_calculator_cache_hit_ratio',
+    'Share of the in-process caches lookups that were hits.',
+    ('cache',),
+))
+cache_size = registry.register(Gauge(
+    'equity_calculator_cache_size',
+    'Items stored in the in-process caches.',
+    ('cache',),
+))
@@ -0,0 +1,69 @@
+"""
+Per-request timings of the computation stages.
+
+Timings are only recorded within `record_stage_timings`, which is entered
+by the Server-Timing and metrics middlewares. Otherwise `timed_stage` is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator, Optional
+
+
+class StageTimings:
+    def __init__(self) -> None:
+        self.started_at = perf_counter()
+        # Seconds spent in the stages, repeated stages (e.g. of batch holders) are summed up
+        self.stages: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @property
+    def elapsed(self) -> float:
+        return perf_counter() - self.started_at
+
+
+_stage_timings: ContextVar[Optional[StageTimings]] = ContextVar('stage_timings', default=None)
+
+
+@contextmanager
+def record_stage_timings() -> Iterator[StageTimings]:
+    """Start recording the timings, the already started recording is shared if any."""
+    stage_timings = _stage_timings.get()
+
+    if stage_timings is not None:
+        yield stage_timings
+        return
+
+    stage_timings = StageTimings()
+    token = _stage_timings.set(stage_timings)
+
+    try:
+        yield stage_timings
+    finally:
+        _stage_timings.reset(token)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    stage_timings = _stage_timings.get()
+
+    if stage_timings is None:
+        yield
+        return
+
+    started_at = perf_counter()
+
+    try:
+        yield
+    finally:
+        stage_timings.add(stage, perf_counter() - started_at)
+
+
+def record_elapsed_stage(stage: str) -> None:
+    """Record time since the timings start as the `stage`, e.g. the request parsing."""
+    stage_timings = _stage_timings.get()
+
+    if stage_timings is not None:
+        stage_timings.add(stage, stage_timings.elapsed)
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 
-from app.api.router import api_v1_router
+from app.api.request_metrics import RequestMetricsMiddleware
+from app.api.router import api_v1_debug_router, api_v1_router
+from app.api.server_timing import ServerTimingMiddleware
 from app.core.config import settings
+from app.services.process_pool import shutdown_process_pool
 
 
 def create_app() -> FastAPI:
@@ -13,13 +16,27 @@ def create_app() -> FastAPI:
             'name': settings.CONTACT_NAME,
             'email': settings.CONTACT_EMAIL,
         },
-
+        on_shutdown=[shutdown_process_pool],
     )
     app.include_router(
         api_v1_router,
         prefix=settings.API_V1_STR,
         tags=['v1'],
     )
+
+    if settings.PROFILING_ENABLED:
+        app.include_router(
+            api_v1_debug_router,
+            prefix=settings.API_V1_STR,
+            tags=['v1'],
+        )
+
+    if settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(ServerTimingMiddleware)
+
+    if settings.METRICS_ENABLED:
+        app.add_middleware(RequestMetricsMiddleware)
+
     return app
 
 
@@ -1,4 +1,6 @@
-from .utils import FormattedDate, FormattedDateConfigMixin
-from .company_valuation import CompanyValuation
-from .grant import OptionGrant
-from .equity import VestedEquityValuation
+from .utils import FormattedDate, FormattedDateConfigMixin, format_date
+from .company_valuation import AnyCompanyValuation, CompanyValuation, CompanyValuationTerms
+from .grant import AnyOptionGrant, OptionGrant, OptionGrantTerms
+from .columnar import CompanyValuationColumns, OptionGrantColumns
+from .equity import VestedEquityValuation, VestedEquityValuationRun
+from .scenario import PricePaths, VestedEquityPercentile, VestedEquityScenarios
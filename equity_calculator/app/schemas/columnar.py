@@ -0,0 +1,135 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from pydantic import BaseModel, root_validator, validator
+
+from app.schemas import FormattedDate
+from app.schemas.company_valuation import CompanyValuationTerms
+from app.schemas.grant import OptionGrantTerms
+
+
+class _Columns(BaseModel):
+    """
+        Parallel arrays of equal length. Their items are not validated by pydantic
+        one by one, but as whole arrays by validators of the subclasses.
+    """
+
+    @validator('*', pre=True)
+    def check_not_empty(cls, value: list) -> list:
+        if not value:
+            raise ValueError('At least one item must be provided')
+
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def check_same_length(cls, values: dict) -> dict:
+        if len({len(column) for column in values.values()}) > 1:
+            raise ValueError('All arrays must have the same length')
+
+        return values
+
+
+class OptionGrantColumns(_Columns):
+    """
+        Option grants as parallel arrays, i-th grant is made of i-th items of the arrays.
+
+        Arrays are validated as a whole, no model is built for every grant.
+    """
+    quantities: list
+    start_dates: list
+    cliff_months: list
+    duration_months: list
+
+    @validator('quantities', 'duration_months')
+    def check_positive_integers(cls, value: list) -> list[int]:
+        _check_integers(value)
+
+        if min(value) <= 0:
+            raise ValueError('All values must be greater than zero')
+
+        return value
+
+    @validator('cliff_months')
+    def check_non_negative_integers(cls, value: list) -> list[int]:
+        _check_integers(value)
+
+        if min(value) < 0:
+            raise ValueError('All values must be greater than or equal to zero')
+
+        return value
+
+    @validator('start_dates')
+    def parse_start_dates(cls, value: list) -> list[date]:
+        return _parse_dates(value)
+
+    @root_validator(skip_on_failure=True)
+    def check_cliff_months_are_within_durations_months(cls, values: dict) -> dict:
+        invalid_grant_idx = next(
+            (
+                grant_idx
+                for grant_idx, (cliff_months, duration_months)
+                in enumerate(zip(values['cliff_months'], values['duration_months']))
+                if cliff_months > duration_months
+            ),
+            None,
+        )
+
+        if invalid_grant_idx is not None:
+            raise ValueError(
+                f'Cliff months value must be within the duration months (grant {invalid_grant_idx})'
+            )
+
+        return values
+
+    def to_option_grants(self) -> list[OptionGrantTerms]:
+        return list(map(
+            OptionGrantTerms,
+            self.quantities, self.start_dates, self.cliff_months, self.duration_months,
+        ))
+
+
+class CompanyValuationColumns(_Columns):
+    """
+        Company valuations as parallel arrays, see `OptionGrantColumns`.
+    """
+    prices: list
+    valuation_dates: list
+
+    @validator('prices')
+    def parse_prices(cls, value: list) -> list[Decimal]:
+        if not set(map(type, value)) <= {int, float, str}:
+            raise ValueError('All values must be numbers')
+
+        try:
+            prices = [Decimal(str(price)) for price in value]
+        except InvalidOperation:
+            raise ValueError('All values must be numbers')
+
+        if not all(price.is_finite() for price in prices) or min(prices) <= 0:
+            raise ValueError('All values must be greater than zero')
+
+        return prices
+
+    @validator('valuation_dates')
+    def parse_valuation_dates(cls, value: list) -> list[date]:
+        return _parse_dates(value)
+
+    def to_company_valuations(self) -> list[CompanyValuationTerms]:
+        return list(map(CompanyValuationTerms, self.prices, self.valuation_dates))
+
+
+def _check_integers(values: list) -> None:
+    # Exact type check, so booleans and floats are not taken for integers
+    if not set(map(type, values)) <= {int}:
+        raise ValueError('All values must be integers')
+
+
+def _parse_dates(values: list) -> list[date]:
+    # Payloads repeat a few distinct dates, so each of them is parsed once
+    try:
+        distinct_dates = set(values)
+    except TypeError:
+        raise ValueError('All values must be dates')
+
+    parsed_dates = {value: FormattedDate.validate(value) for value in distinct_dates}
+    return [parsed_dates[value] for value in values]
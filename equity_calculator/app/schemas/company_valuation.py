@@ -1,4 +1,6 @@
+from datetime import date
 from decimal import Decimal
+from typing import NamedTuple, Union
 
 from pydantic import BaseModel, Field
 
@@ -8,3 +10,12 @@ from app.schemas import FormattedDate
 class CompanyValuation(BaseModel):
     price: Decimal = Field(..., gt=0)
     valuation_date: FormattedDate
+
+
+class CompanyValuationTerms(NamedTuple):
+    """Company valuation validated in bulk, see `CompanyValuationColumns`."""
+    price: Decimal
+    valuation_date: date
+
+
+AnyCompanyValuation = Union[CompanyValuation, CompanyValuationTerms]
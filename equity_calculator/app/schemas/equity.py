@@ -17,3 +17,13 @@ class VestedEquityValuation(BaseModel):
 
     class Config(FormattedDateConfigMixin):
         allow_population_by_field_name = True
+
+
+class VestedEquityValuationRun(BaseModel):
+    """Consecutive timeline points from the start to the end date of the same total value."""
+    total_value: Decimal
+    start_date: FormattedDate
+    end_date: FormattedDate
+
+    class Config(FormattedDateConfigMixin):
+        ...
@@ -1,3 +1,6 @@
+from datetime import date
+from typing import NamedTuple, Union
+
 from pydantic import BaseModel, NonNegativeInt, PositiveInt, root_validator
 
 from app.schemas import FormattedDate
@@ -18,3 +21,15 @@ class OptionGrant(BaseModel):
             raise ValueError('Cliff months value must be within the duration months')
 
         return values
+
+
+class OptionGrantTerms(NamedTuple):
+    """Terms of a grant validated in bulk, see `OptionGrantColumns`."""
+    quantity: int
+    start_date: date
+    cliff_months: int
+    duration_months: int
+
+
+# Computations only read grant terms, so they accept both
+AnyOptionGrant = Union[OptionGrant, OptionGrantTerms]
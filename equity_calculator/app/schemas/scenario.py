@@ -0,0 +1,59 @@
+from typing import Any, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.schemas import FormattedDate, FormattedDateConfigMixin
+
+
+class PricePaths(np.ndarray):
+    """
+        Scenarios × valuation dates matrix of prices for pydantic models,
+        validated as a whole float array rather than number by number.
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: dict[str, Any]) -> None:
+        field_schema.update(type='array', items={'type': 'array', 'items': {'type': 'number'}})
+
+    @classmethod
+    def validate(cls, value: Any) -> np.ndarray:
+        if not isinstance(value, list):
+            raise ValueError('Price paths must be an array of arrays of prices')
+
+        try:
+            prices = np.array(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError('All price paths must be arrays of numbers of the same length')
+
+        if prices.ndim != 2 or not prices.size:
+            raise ValueError('At least one price path with one price must be provided')
+
+        if len(prices) > settings.SCENARIO_MAX_COUNT:
+            raise ValueError(f'At most {settings.SCENARIO_MAX_COUNT} price paths can be provided')
+
+        if not np.isfinite(prices).all() or (prices <= 0).any():
+            raise ValueError('All prices must be greater than zero')
+
+        return prices
+
+
+class VestedEquityPercentile(BaseModel):
+    """Percentile of the scenarios total values on every timeline point."""
+    percentile: float
+    total_values: list[float]
+
+
+class VestedEquityScenarios(BaseModel):
+    dates: list[FormattedDate]
+    # Scenarios × dates total values, None unless requested
+    scenarios: Optional[list[list[float]]]
+    percentiles: list[VestedEquityPercentile]
+
+    class Config(FormattedDateConfigMixin):
+        ...
@@ -4,6 +4,10 @@ from pydantic import errors
 from pydantic.datetime_parse import StrBytesIntFloat, parse_date
 
 from app.core.config import settings
+from app.services.cache import formatted_date_cache, parsed_date_cache
+
+# Format of the API dates, parsed without strptime
+_DAY_MONTH_YEAR_FORMAT = '%d-%m-%Y'
 
 
 class FormattedDate(date):
@@ -19,14 +23,49 @@ class FormattedDate(date):
         Use standard pydantic parse_date function as a fallback.
         """
         if isinstance(value, str):
-            try:
-                return datetime.strptime(value, settings.DATE_FORMAT).date()
-            except ValueError:
-                raise errors.DateError()
+            parsed_date = parsed_date_cache.get(value)
+
+            if parsed_date is None:
+                try:
+                    parsed_date = _parse_formatted_date(value)
+                except ValueError:
+                    raise errors.DateError()
+
+                parsed_date_cache.set(value, parsed_date)
+
+            return parsed_date
 
         return parse_date(value)
 
 
+def _parse_formatted_date(value: str) -> date:
+    if settings.DATE_FORMAT == _DAY_MONTH_YEAR_FORMAT and _is_day_month_year(value):
+        return date(int(value[6:]), int(value[3:5]), int(value[:2]))
+
+    # Other formats and dates without zero padding, which strptime accepts as well
+    return datetime.strptime(value, settings.DATE_FORMAT).date()
+
+
+def _is_day_month_year(value: str) -> bool:
+    return (
+        len(value) == 10
+        and value[2] == value[5] == '-'
+        and value.isascii()
+        and (value[:2] + value[3:5] + value[6:]).isdigit()
+    )
+
+
+def format_date(date_: date) -> str:
+    """Format date in settings.DATE_FORMAT."""
+    formatted_date = formatted_date_cache.get(date_)
+
+    if formatted_date is None:
+        formatted_date = date_.strftime(settings.DATE_FORMAT)
+        formatted_date_cache.set(date_, formatted_date)
+
+    return formatted_date
+
+
 class FormattedDateConfigMixin:
     """
     Serialize FormattedDate field with it's format
@@ -42,5 +81,5 @@ class FormattedDateConfigMixin:
     for a better solution to be proposed.
     """
     json_encoders = {
-        date: lambda date_: date_.strftime('%d-%m-%Y'),
+        date: format_date,
     }
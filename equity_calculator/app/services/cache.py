@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+from app.core.config import settings
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(Generic[K, V]):
+    """
+        Thread-safe in-process cache evicting the least recently used items
+        when `max_size` is exceeded and items older than `ttl_seconds` (if set).
+
+        Size is the number of items unless `get_size` of an item is set,
+        e.g. to bound the cache by bytes. Items larger than `max_size` are not stored,
+        cache with zero `max_size` stores nothing.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = monotonic,
+        get_size: Callable[[V], int] = lambda value: 1,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._get_size = get_size
+        # Items with the time they are stored at and their sizes
+        self._items: OrderedDict[K, tuple[float, V, int]] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is not None and self._is_expired(item[0]):
+                self._pop(key)
+                item = None
+
+            if item is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key: K, value: V) -> None:
+        item_size = self._get_size(value)
+
+        if item_size > self.max_size:
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._items[key] = (self._clock(), value, item_size)
+            self._size += item_size
+
+            while self._size > self.max_size:
+                self._pop(next(iter(self._items)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+            self._hits = 0
+            self._misses = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._size, self.max_size)
+
+    def _pop(self, key: K) -> None:
+        item = self._items.pop(key, None)
+
+        if item is not None:
+            self._size -= item[2]
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds
+
+
+# Vest months offsets from the grant start with quantities by (quantity, cliff, duration)
+VestingTemplateKey = tuple[int, int, int]
+VestingTemplate = tuple[tuple[int, int], ...]
+
+# Dates by their strings in settings.DATE_FORMAT and vice versa
+parsed_date_cache: LRUCache[str, date] = LRUCache(settings.DATE_CACHE_SIZE)
+formatted_date_cache: LRUCache[date, str] = LRUCache(settings.DATE_CACHE_SIZE)
+
+# Encoded responses by their ETags, bounded by the bytes of the responses
+result_cache: LRUCache[str, bytes] = LRUCache(
+    settings.RESULT_CACHE_MAX_BYTES, settings.RESULT_CACHE_TTL_SECONDS, get_size=len,
+)
+
+vesting_template_cache: LRUCache[VestingTemplateKey, VestingTemplate] = LRUCache(
+    settings.VESTING_TEMPLATE_CACHE_SIZE,
+)
+
+# Reports of the profiled requests by their ids
+profile_report_cache: LRUCache[str, dict[str, Any]] = LRUCache(
+    settings.PROFILE_REPORT_CACHE_SIZE,
+)
+
+
+def get_caches_stats() -> dict[str, CacheStats]:
+    return {
+        'results': result_cache.stats,
+        'vesting_templates': vesting_template_cache.stats,
+        'parsed_dates': parsed_date_cache.stats,
+        'formatted_dates': formatted_date_cache.stats,
+    }
@@ -0,0 +1,48 @@
+"""
+Integer calendar for the vesting hot paths.
+
+A date is represented as a `(month_ordinal, day)` pair, where month ordinal
+is `year * 12 + month - 1`, so shifting a date by months is an integer addition
+and `datetime.date` objects are only built for the API output.
+"""
+from calendar import isleap
+from datetime import date
+
+MonthDay = tuple[int, int]
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Days up to this one are present in every month and never need clamping
+MIN_DAYS_IN_MONTH = min(_DAYS_IN_MONTH)
+
+# Gregorian calendar repeats itself every 400 years (4800 months)
+_CALENDAR_CYCLE_MONTHS = 400 * 12
+
+_CYCLE_DAYS_IN_MONTH = tuple(
+    _DAYS_IN_MONTH[month_idx] + (month_idx == 1 and isleap(cycle_year))
+    for cycle_year in range(400)
+    for month_idx in range(12)
+)
+
+
+def days_in_month(month_ordinal: int) -> int:
+    return _CYCLE_DAYS_IN_MONTH[month_ordinal % _CALENDAR_CYCLE_MONTHS]
+
+
+def shift_months(month_ordinal: int, months: int, day: int) -> MonthDay:
+    """
+        Get the date in `months` from `month_ordinal` with the `day` set
+        or the last month day when there is not such day in that month.
+    """
+    target_month_ordinal = month_ordinal + months
+    return target_month_ordinal, min(day, days_in_month(target_month_ordinal))
+
+
+def to_month_day(date_: date) -> MonthDay:
+    return date_.year * 12 + date_.month - 1, date_.day
+
+
+def to_date(month_day: MonthDay) -> date:
+    month_ordinal, day = month_day
+    year, month_idx = divmod(month_ordinal, 12)
+    return date(year, month_idx + 1, day)
@@ -0,0 +1,231 @@
+"""
+Offload of CPU-heavy timeline computations to a pool of worker processes.
+
+Request threads only wait for the worker result there, so one large request
+doesn't hold the GIL for everyone else. Small requests are computed in-process
+to not pay for the payload serialization and IPC.
+"""
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Mapping, Optional, Sequence, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import process_pool_queue_depth
+from app.core.timing import timed_stage
+from app.schemas import (AnyCompanyValuation, AnyOptionGrant, CompanyValuationTerms,
+                         OptionGrantTerms)
+from app.services.vectorized_vesting_calculator import Granularity
+from app.services.vesting_calculator import (TimelineWindow, ValuatedTimeline,
+                                             get_valuated_timeline, get_valuated_timelines)
+
+# Compact payloads sent to the worker processes, dates are passed as ordinals
+SerializedGrant = tuple[int, int, int, int]
+SerializedValuation = tuple[int, Decimal]
+SerializedTimeline = tuple[list[int], list[Decimal]]
+SerializedWindow = tuple[Optional[int], Optional[int]]
+
+T = TypeVar('T')
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the process pool, it is started on the first use if PROCESS_POOL_SIZE is set."""
+    global _process_pool
+
+    if _process_pool is None and settings.PROCESS_POOL_SIZE > 0:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_SIZE,
+            # Forking a process with running server threads is not safe
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def estimate_computation_cost(option_grants: Sequence[AnyOptionGrant]) -> int:
+    """Estimate the computation cost as grants × months of the longest grant."""
+    return len(option_grants) * max((grant.duration_months for grant in option_grants), default=0)
+
+
+def run_valuated_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> ValuatedTimeline:
+    """
+        Same as `vesting_calculator.get_valuated_timeline`, but computed
+        in the process pool when its cost exceeds PROCESS_POOL_COST_THRESHOLD.
+    """
+    process_pool = get_process_pool()
+
+    if (
+        process_pool is None
+        or estimate_computation_cost(option_grants) <= settings.PROCESS_POOL_COST_THRESHOLD
+    ):
+        return get_valuated_timeline(option_grants, company_valuations, window, granularity)
+
+    serialized_timeline = _run_in_process_pool(
+        process_pool,
+        _compute_valuated_timeline,
+        _serialize_option_grants(option_grants),
+        _serialize_company_valuations(company_valuations),
+        window and _serialize_window(window),
+        granularity,
+    )
+
+    return _deserialize_timeline(serialized_timeline)
+
+
+def run_valuated_timelines(
+    holder_option_grants: Mapping[str, Sequence[AnyOptionGrant]],
+    company_valuations: Sequence[AnyCompanyValuation],
+) -> dict[str, ValuatedTimeline]:
+    """
+        Same as `vesting_calculator.get_valuated_timelines`, but computed
+        in the process pool when its cost exceeds PROCESS_POOL_COST_THRESHOLD.
+    """
+    process_pool = get_process_pool()
+
+    if process_pool is None or sum(
+        map(estimate_computation_cost, holder_option_grants.values())
+    ) <= settings.PROCESS_POOL_COST_THRESHOLD:
+        return get_valuated_timelines(holder_option_grants, company_valuations)
+
+    serialized_timelines = _run_in_process_pool(
+        process_pool,
+        _compute_valuated_timelines,
+        {
+            holder_id: _serialize_option_grants(option_grants)
+            for holder_id, option_grants in holder_option_grants.items()
+        },
+        _serialize_company_valuations(company_valuations),
+    )
+
+    return {
+        holder_id: _deserialize_timeline(serialized_timeline)
+        for holder_id, serialized_timeline in serialized_timelines.items()
+    }
+
+
+def _run_in_process_pool(
+    process_pool: ProcessPoolExecutor, function: Callable[..., T], *args: Any,
+) -> T:
+    # Stages within the worker are not timed separately
+    with timed_stage('process_pool'):
+        process_pool_queue_depth.inc()
+
+        try:
+            future: Future[T] = process_pool.submit(function, *args)
+        except BaseException:
+            process_pool_queue_depth.dec()
+            raise
+
+        future.add_done_callback(lambda _: process_pool_queue_depth.dec())
+        return future.result()
+
+
+def _compute_valuated_timeline(
+    serialized_grants: list[SerializedGrant],
+    serialized_valuations: list[SerializedValuation],
+    serialized_window: Optional[SerializedWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> SerializedTimeline:
+    """Worker process entrypoint."""
+    return _serialize_timeline(
+        get_valuated_timeline(
+            _deserialize_option_grants(serialized_grants),
+            _deserialize_company_valuations(serialized_valuations),
+            serialized_window and _deserialize_window(serialized_window),
+            granularity,
+        )
+    )
+
+
+def _compute_valuated_timelines(
+    holder_serialized_grants: dict[str, list[SerializedGrant]],
+    serialized_valuations: list[SerializedValuation],
+) -> dict[str, SerializedTimeline]:
+    """Worker process entrypoint."""
+    valuated_timelines = get_valuated_timelines(
+        {
+            holder_id: _deserialize_option_grants(serialized_grants)
+            for holder_id, serialized_grants in holder_serialized_grants.items()
+        },
+        _deserialize_company_valuations(serialized_valuations),
+    )
+
+    return {
+        holder_id: _serialize_timeline(valuated_timeline)
+        for holder_id, valuated_timeline in valuated_timelines.items()
+    }
+
+
+def _serialize_option_grants(
+    option_grants: Sequence[AnyOptionGrant],
+) -> list[SerializedGrant]:
+    return [
+        (grant.quantity, grant.start_date.toordinal(), grant.cliff_months, grant.duration_months)
+        for grant in option_grants
+    ]
+
+
+def _deserialize_option_grants(
+    serialized_grants: list[SerializedGrant],
+) -> list[OptionGrantTerms]:
+    # Grants are already validated by the request process
+    return [
+        OptionGrantTerms(quantity, date.fromordinal(start_date), cliff_months, duration_months)
+        for quantity, start_date, cliff_months, duration_months in serialized_grants
+    ]
+
+
+def _serialize_company_valuations(
+    company_valuations: Sequence[AnyCompanyValuation],
+) -> list[SerializedValuation]:
+    return [(cv.valuation_date.toordinal(), cv.price) for cv in company_valuations]
+
+
+def _deserialize_company_valuations(
+    serialized_valuations: list[SerializedValuation],
+) -> list[CompanyValuationTerms]:
+    return [
+        CompanyValuationTerms(price, date.fromordinal(valuation_date))
+        for valuation_date, price in serialized_valuations
+    ]
+
+
+def _serialize_window(window: TimelineWindow) -> SerializedWindow:
+    from_date, to_date = window
+    return (
+        None if from_date is None else from_date.toordinal(),
+        None if to_date is None else to_date.toordinal(),
+    )
+
+
+def _deserialize_window(serialized_window: SerializedWindow) -> TimelineWindow:
+    from_date, to_date = serialized_window
+    return TimelineWindow(
+        None if from_date is None else date.fromordinal(from_date),
+        None if to_date is None else date.fromordinal(to_date),
+    )
+
+
+def _serialize_timeline(valuated_timeline: ValuatedTimeline) -> SerializedTimeline:
+    return [date_.toordinal() for date_ in valuated_timeline.dates], valuated_timeline.total_values
+
+
+def _deserialize_timeline(serialized_timeline: SerializedTimeline) -> ValuatedTimeline:
+    dates, total_values = serialized_timeline
+    return ValuatedTimeline([date.fromordinal(date_) for date_ in dates], total_values)
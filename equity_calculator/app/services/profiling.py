@@ -0,0 +1,112 @@
+"""
+Diagnostics of a single computation with cProfile and tracemalloc.
+
+Both profilers slow down the whole process and tracemalloc traces allocations
+of every thread, so profiled computations are run one at a time and the reports
+are only meant for the debugging of slow payloads.
+"""
+import cProfile
+import pstats
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Any, Iterator
+
+from app.services.cache import profile_report_cache
+
+# Number of the reported functions and allocation sites
+TOP_ENTRIES = 30
+
+ProfileReport = dict[str, Any]
+
+_profiling_lock = Lock()
+
+
+@contextmanager
+def profile_computation() -> Iterator[ProfileReport]:
+    """
+        Profile the code within the context, the yielded report is filled on exit
+        and stored in `cache.profile_report_cache` by its `id`.
+
+        Allocation sites are of the memory allocated within the context and still
+        held on exit, e.g. by the computation result.
+    """
+    report: ProfileReport = {'id': uuid.uuid4().hex}
+
+    with _profiling_lock:
+        started_tracemalloc = not tracemalloc.is_tracing()
+
+        if started_tracemalloc:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+        initial_memory, _ = tracemalloc.get_traced_memory()
+        initial_snapshot = tracemalloc.take_snapshot()
+
+        profiler = cProfile.Profile()
+        started_at = perf_counter()
+        profiler.enable()
+
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            report['duration_seconds'] = perf_counter() - started_at
+
+            _, peak_memory = tracemalloc.get_traced_memory()
+            final_snapshot = tracemalloc.take_snapshot()
+
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+        report['functions'] = _get_top_functions(profiler)
+        report['peak_memory_bytes'] = peak_memory - initial_memory
+        report['allocations'] = _get_top_allocations(initial_snapshot, final_snapshot)
+
+    profile_report_cache.set(report['id'], report)
+
+
+def _get_top_functions(profiler: cProfile.Profile) -> list[dict[str, Any]]:
+    # (file, line, function) -> (primitive calls, calls, own time, cumulative time, callers),
+    # typed `get_stats_profile` merges functions of the same name from different files
+    function_stats = pstats.Stats(profiler).stats  # type: ignore[attr-defined]
+    top_function_stats = sorted(
+        function_stats.items(), key=lambda function_stat: function_stat[1][3], reverse=True,
+    )[:TOP_ENTRIES]
+
+    return [
+        {
+            'function': f'{file_name}:{line}({function_name})',
+            'calls': calls,
+            'own_seconds': own_seconds,
+            'cumulative_seconds': cumulative_seconds,
+        }
+        for (file_name, line, function_name), (_, calls, own_seconds, cumulative_seconds, _)
+        in top_function_stats
+    ]
+
+
+def _get_top_allocations(
+    initial_snapshot: tracemalloc.Snapshot, final_snapshot: tracemalloc.Snapshot,
+) -> list[dict[str, Any]]:
+    # Skip allocations of the profilers themselves
+    own_traces_filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    allocation_stats = final_snapshot.filter_traces(own_traces_filters).compare_to(
+        initial_snapshot.filter_traces(own_traces_filters), 'lineno',
+    )
+
+    # Statistics are sorted by the absolute difference, freed memory is not of interest
+    return [
+        {
+            'location': str(allocation_stat.traceback),
+            'size_bytes': allocation_stat.size_diff,
+            'count': allocation_stat.count_diff,
+        }
+        for allocation_stat in allocation_stats
+        if allocation_stat.size_diff > 0
+    ][:TOP_ENTRIES]
@@ -0,0 +1,130 @@
+"""
+Valuation of a vesting schedule under many price scenarios at once.
+
+The schedule doesn't depend on the prices, so the cumulative vested quantities
+are computed once and every scenario is valuated by the same array multiplication.
+Values are float64 rather than Decimals, scenarios are estimates anyway.
+"""
+from datetime import date
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.timing import timed_stage
+from app.schemas import AnyOptionGrant
+from app.services.month_calendar import to_date
+from app.services.vectorized_vesting_calculator import Granularity
+from app.services.vesting_calculator import (TimelineWindow, check_computation_inputs,
+                                             form_vesting_timeline)
+
+
+# Values of the scenarios valuated at once for their percentiles, ~8 MB of float64
+_PERCENTILES_CHUNK_VALUES = 1 << 20
+
+
+class ScenarioValuationMatrix(NamedTuple):
+    """
+        Total values of the vested equity on every timeline point (columns)
+        in every scenario (rows) and their percentiles over the scenarios.
+    """
+    dates: list[date]
+    # None unless the values of every scenario are requested
+    total_values: Optional[np.ndarray]
+    # Row per requested percentile
+    percentile_values: np.ndarray
+
+
+def get_scenario_valuations(
+    option_grants: Sequence[AnyOptionGrant],
+    valuation_dates: Sequence[date],
+    price_paths: np.ndarray,
+    percentiles: Sequence[float] = (),
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+    include_scenarios: bool = True,
+) -> ScenarioValuationMatrix:
+    """
+        Valuate the grants timeline with every price path, i-th column of the scenarios ×
+        valuation dates `price_paths` matrix is of i-th valuation date. A timeline point
+        is valuated with the price of the latest valuation date on or before it.
+
+        Scenarios × timeline points are limited by settings.SCENARIO_MAX_VALUES. Without
+        `include_scenarios` only the percentiles are computed, over chunks of the points,
+        so the whole values matrix is never built.
+    """
+    check_computation_inputs(option_grants, valuation_dates)
+
+    if price_paths.shape != (len(price_paths), len(valuation_dates)):
+        raise ValueError('Every price path must have a price for every valuation date')
+
+    vesting_timeline = form_vesting_timeline(option_grants, window, granularity)
+    timeline_month_days = list(vesting_timeline.month_days())
+
+    if len(price_paths) * len(timeline_month_days) > settings.SCENARIO_MAX_VALUES:
+        raise ValueError(
+            f'Scenarios × timeline points must be at most {settings.SCENARIO_MAX_VALUES}, '
+            'narrow the window or coarsen the granularity'
+        )
+
+    with timed_stage('valuation'):
+        # Quantities may not fit into int64, values are floats anyway
+        cumulative_vested_quantities = np.cumsum(
+            np.array(vesting_timeline.vested_quantities, dtype=np.float64)
+        )
+
+        valuation_ordinals = np.array(
+            [valuation_date.toordinal() for valuation_date in valuation_dates], dtype=np.int64,
+        )
+        # Stable sort, so the last of the same date valuations is the latest one
+        valuation_order = np.argsort(valuation_ordinals, kind='stable')
+        timeline_ordinals = np.array(
+            [to_date(month_day).toordinal() for month_day in timeline_month_days],
+            dtype=np.int64,
+        )
+        valuation_idx = np.searchsorted(
+            valuation_ordinals[valuation_order], timeline_ordinals, side='right',
+        ) - 1
+
+        # Timeline points are ascending, so the first one has the earliest valuation
+        if len(valuation_idx) and valuation_idx[0] < 0:
+            raise ValueError('Unknown stock price at the start of the timeline')
+
+        valuation_columns = valuation_order[valuation_idx]
+        total_values = (
+            _valuate_scenarios(price_paths, valuation_columns, cumulative_vested_quantities)
+            if include_scenarios
+            else None
+        )
+        percentile_values = np.empty((len(percentiles), len(timeline_month_days)))
+
+        if len(percentiles):
+            chunk_points = max(_PERCENTILES_CHUNK_VALUES // len(price_paths), 1)
+
+            for chunk_start in range(0, len(timeline_month_days), chunk_points):
+                chunk = slice(chunk_start, chunk_start + chunk_points)
+                chunk_values = (
+                    total_values[:, chunk]
+                    if total_values is not None
+                    else _valuate_scenarios(
+                        price_paths, valuation_columns[chunk], cumulative_vested_quantities[chunk],
+                    )
+                )
+                percentile_values[:, chunk] = np.percentile(chunk_values, percentiles, axis=0)
+
+    return ScenarioValuationMatrix(
+        [to_date(month_day) for month_day in timeline_month_days],
+        total_values,
+        percentile_values,
+    )
+
+
+def _valuate_scenarios(
+    price_paths: np.ndarray,
+    valuation_columns: np.ndarray,
+    cumulative_vested_quantities: np.ndarray,
+) -> np.ndarray:
+    # Gathered prices are a new array, so they are multiplied in place
+    total_values = price_paths[:, valuation_columns]
+    total_values *= cumulative_vested_quantities
+    return total_values
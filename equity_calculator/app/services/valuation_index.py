@@ -0,0 +1,53 @@
+from bisect import bisect_right
+from decimal import Decimal
+from operator import itemgetter
+from typing import Iterable, Iterator, NamedTuple
+
+from app.schemas import AnyCompanyValuation
+from app.services.month_calendar import MonthDay, to_month_day
+
+
+class ValuationIndex(NamedTuple):
+    """
+        Company valuations as columnar arrays sorted by valuation date
+        for the as-of lookup of the latest price.
+    """
+    valuation_dates: list[MonthDay]
+    prices: list[Decimal]
+
+    @classmethod
+    def from_company_valuations(
+        cls, company_valuations: Iterable[AnyCompanyValuation],
+    ) -> 'ValuationIndex':
+        sorted_valuations = sorted(
+            ((to_month_day(cv.valuation_date), cv.price) for cv in company_valuations),
+            key=itemgetter(0),
+        )
+        return cls(
+            [valuation_date for valuation_date, _ in sorted_valuations],
+            [price for _, price in sorted_valuations],
+        )
+
+    def find_latest_valuation_idx(self, timeline_date: MonthDay, lo: int = 0) -> int:
+        """
+            Get index of the last valuation on or before the `timeline_date`, -1 if there is none.
+
+            `lo` can be set to the index found for an earlier date to narrow the search.
+        """
+        return bisect_right(self.valuation_dates, timeline_date, lo) - 1
+
+
+def join_asof(
+    timeline_dates: Iterable[MonthDay], valuation_index: ValuationIndex, valuation_idx: int = 0,
+) -> Iterator[tuple[MonthDay, int]]:
+    """
+        For every date of ascending `timeline_dates` yield the date with index of
+        the valuation actual at that date (-1 if there is none), in O(log V) per date.
+
+        `valuation_idx` can be set to the index found for a date before the timeline.
+    """
+    for timeline_date in timeline_dates:
+        valuation_idx = valuation_index.find_latest_valuation_idx(
+            timeline_date, max(valuation_idx, 0)
+        )
+        yield timeline_date, valuation_idx
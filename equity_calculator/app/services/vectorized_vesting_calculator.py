@@ -0,0 +1,186 @@
+from datetime import date
+from typing import Literal, Sequence
+
+import numpy as np
+
+from app.schemas import AnyOptionGrant
+from app.services.month_calendar import MonthDay, to_date, to_month_day
+
+# Largest intermediate `quantity * month` product that still fits into int64
+_INT64_SAFE_PRODUCT = np.iinfo(np.int64).max
+
+# Month ordinal (see `month_calendar`) of numpy datetime64[M] zero point
+_EPOCH_MONTH_ORDINAL = 1970 * 12
+
+# Days are packed with month ordinals into a single integer key: ordinal * 32 + day
+_DAYS_KEY_BASE = 32
+
+Granularity = Literal['daily', 'weekly', 'monthly', 'quarterly', 'yearly']
+
+# Periods of the month-based granularities in months
+_PERIOD_MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+# Days since numpy datetime64[D] zero point (Thursday) of the first Monday
+_FIRST_MONDAY_DAYS = 4
+
+
+def form_vectorized_vesting_schedule(option_grants: Sequence[AnyOptionGrant]) -> dict[date, int]:
+    """
+        Same as `vesting_calculator.form_vesting_schedule`, but every vest event
+        of every grant is computed with array operations at once.
+
+        Prefer it for requests with thousands of grants, for a few grants
+        the cost of building the arrays outweighs the pure Python loop.
+    """
+    return {
+        to_date(month_day): vested_quantity
+        for month_day, vested_quantity
+        in form_vectorized_month_day_vesting_schedule(option_grants).items()
+    }
+
+
+def form_vectorized_month_day_vesting_schedule(
+    option_grants: Sequence[AnyOptionGrant],
+) -> dict[MonthDay, int]:
+    """
+        Same as `form_vectorized_vesting_schedule`, but dates are `month_calendar.MonthDay` pairs.
+    """
+    if not option_grants:
+        return {}
+
+    quantities_list = [grant.quantity for grant in option_grants]
+    durations = np.array([grant.duration_months for grant in option_grants], dtype=np.int64)
+    cliffs = np.array([grant.cliff_months for grant in option_grants], dtype=np.int64)
+
+    # Fall back to Python integers when `quantity * duration` may overflow int64
+    quantities_dtype = (
+        np.int64
+        if max(quantities_list) * int(durations.max()) <= _INT64_SAFE_PRODUCT
+        else object
+    )
+    quantities = np.array(quantities_list, dtype=quantities_dtype)
+
+    start_dates = np.array([grant.start_date for grant in option_grants], dtype='datetime64[D]')
+    start_months = start_dates.astype('datetime64[M]')
+    start_days = (start_dates - start_months.astype('datetime64[D]')).astype(np.int64) + 1
+
+    # Every grant vests at the cliff month (or the first month without a cliff)
+    # and then every month until the end of the duration
+    first_vesting_months = np.maximum(cliffs, 1)
+    events_counts = durations - first_vesting_months + 1
+
+    grant_idx = np.repeat(np.arange(len(option_grants)), events_counts)
+    event_position = (
+        np.arange(events_counts.sum())
+        - np.repeat(np.cumsum(events_counts) - events_counts, events_counts)
+    )
+    months = first_vesting_months[grant_idx] + event_position
+    prev_months = np.where(event_position == 0, 0, months - 1)
+
+    event_quantities = quantities[grant_idx]
+    event_durations = durations[grant_idx]
+    vest_quantities = (
+        event_quantities * months // event_durations
+        - event_quantities * prev_months // event_durations
+    )
+
+    # Set the initial day of the grant or the last day of a shorter month
+    vest_months = start_months[grant_idx] + months
+    vest_month_starts = vest_months.astype('datetime64[D]')
+    days_in_month = ((vest_months + 1).astype('datetime64[D]') - vest_month_starts).astype(np.int64)
+    vest_days = np.minimum(start_days[grant_idx], days_in_month)
+    vest_keys = (
+        (vest_months.astype(np.int64) + _EPOCH_MONTH_ORDINAL) * _DAYS_KEY_BASE + vest_days
+    )
+
+    vested = vest_quantities != 0
+    schedule_keys, key_idx = np.unique(vest_keys[vested], return_inverse=True)
+    schedule_quantities = np.zeros(len(schedule_keys), dtype=quantities_dtype)
+    np.add.at(schedule_quantities, key_idx, vest_quantities[vested])
+
+    return {
+        divmod(key, _DAYS_KEY_BASE): int(quantity)
+        for key, quantity in zip(schedule_keys.tolist(), schedule_quantities.tolist())
+    }
+
+
+def form_period_vesting_timeline(
+    vesting_schedule: dict[MonthDay, int],
+    start_date: MonthDay,
+    end_date: MonthDay,
+    granularity: Granularity,
+) -> tuple[list[MonthDay], list[int]]:
+    """
+        Same as `vesting_calculator.form_dense_monthly_vesting_timeline`, but points are
+        starts of the `granularity` periods (weeks start on Mondays) and timeline dates
+        are returned with the quantities vested on them.
+
+        Every vest event is accumulated on the first period start on or after it
+        with a single sorted search, except the vests on the end date.
+        Vests of the end period before the end date are accumulated on the start
+        of the next period, which is the last point then.
+    """
+    start_day, end_day = _to_days(np.array([start_date, end_date], dtype=np.int64))
+    start_period, end_period = _to_periods(np.array([start_day, end_day]), granularity)
+
+    # Start date, period starts after it up to the end date and the one after the end date
+    anchors = np.concatenate((
+        [start_day],
+        _from_periods(np.arange(start_period + 1, end_period + 2), granularity),
+    ))
+    has_separate_end_point = not (anchors == end_day).any()
+
+    event_days = _to_days(np.array(list(vesting_schedule), dtype=np.int64).reshape(-1, 2))
+    event_quantities_list = list(vesting_schedule.values())
+    quantities_dtype = np.int64 if sum(event_quantities_list) <= _INT64_SAFE_PRODUCT else object
+    event_quantities = np.array(event_quantities_list, dtype=quantities_dtype)
+
+    on_end_date = (event_days == end_day) & has_separate_end_point
+    anchor_quantities = np.zeros(len(anchors), dtype=quantities_dtype)
+    np.add.at(
+        anchor_quantities,
+        np.searchsorted(anchors, event_days[~on_end_date], side='left'),
+        event_quantities[~on_end_date],
+    )
+
+    timeline_days = anchors[:-1].tolist()
+    vested_quantities = anchor_quantities[:-1].tolist()
+
+    if has_separate_end_point:
+        timeline_days.append(end_day.item())
+        vested_quantities.append(event_quantities[on_end_date].sum())
+
+    # Drop the point after the end date if nothing is accumulated on it
+    if anchor_quantities[-1]:
+        timeline_days.append(anchors[-1].item())
+        vested_quantities.append(anchor_quantities[-1])
+
+    return list(map(to_month_day, timeline_days)), list(map(int, vested_quantities))
+
+
+def _to_days(month_days: np.ndarray) -> np.ndarray:
+    """Convert `MonthDay` pairs array of shape (n, 2) to datetime64[D] array."""
+    month_starts = (month_days[:, 0] - _EPOCH_MONTH_ORDINAL).astype('datetime64[M]')
+    return month_starts.astype('datetime64[D]') + (month_days[:, 1] - 1)
+
+
+def _to_periods(days: np.ndarray, granularity: Granularity) -> np.ndarray:
+    """Get indices of the periods the days belong to."""
+    if granularity == 'daily':
+        return days.astype(np.int64)
+
+    if granularity == 'weekly':
+        return (days.astype(np.int64) - _FIRST_MONDAY_DAYS) // 7
+
+    return days.astype('datetime64[M]').astype(np.int64) // _PERIOD_MONTHS[granularity]
+
+
+def _from_periods(periods: np.ndarray, granularity: Granularity) -> np.ndarray:
+    """Get start days of the periods by their indices."""
+    if granularity == 'daily':
+        return periods.astype('datetime64[D]')
+
+    if granularity == 'weekly':
+        return (periods * 7 + _FIRST_MONDAY_DAYS).astype('datetime64[D]')
+
+    return (periods * _PERIOD_MONTHS[granularity]).astype('datetime64[M]').astype('datetime64[D]')
@@ -1,110 +1,589 @@
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from datetime import date, datetime, time
-from fractions import Fraction
+from datetime import date
+from decimal import Decimal
+from itertools import accumulate
 from operator import attrgetter
-from typing import DefaultDict, Optional
+from typing import (Callable, DefaultDict, Iterable, Iterator, Mapping, NamedTuple, Optional,
+                    Sequence, Sized, Union)
 
-from dateutil.relativedelta import relativedelta
-from dateutil.rrule import MONTHLY, rrule
+from app.core.config import settings
+from app.core.timing import timed_stage
+from app.schemas import AnyCompanyValuation, AnyOptionGrant, VestedEquityValuation
+from app.services.cache import VestingTemplate, VestingTemplateKey, vesting_template_cache
+from app.services.month_calendar import (MIN_DAYS_IN_MONTH, MonthDay, days_in_month,
+                                         shift_months, to_date, to_month_day)
+from app.services.valuation_index import ValuationIndex, join_asof
+from app.services.vectorized_vesting_calculator import (
+    Granularity, form_period_vesting_timeline, form_vectorized_month_day_vesting_schedule)
 
-from app.schemas import CompanyValuation, OptionGrant, VestedEquityValuation
+
+# Timeline date with the total value of equity vested by that date
+ValuatedPoint = tuple[date, Decimal]
+
+
+class ValuatedTimeline(NamedTuple):
+    """
+        Equity value timeline as columnar dates and total values arrays.
+
+        Values are computed from positive prices and vested quantities,
+        so they don't need validation on the way to the response.
+    """
+    dates: list[date]
+    total_values: list[Decimal]
+
+    def to_vested_equity_valuations(self) -> list[VestedEquityValuation]:
+        return [
+            VestedEquityValuation(date_=timeline_date, total_value=total_value)
+            for timeline_date, total_value in zip(self.dates, self.total_values)
+        ]
+
+
+class ValuatedRuns(NamedTuple):
+    """
+        Equity value timeline as columnar arrays of runs, consecutive points
+        from the start to the end date of the same total value.
+    """
+    start_dates: list[date]
+    end_dates: list[date]
+    total_values: list[Decimal]
+
+
+class TimelineWindow(NamedTuple):
+    """Inclusive bounds of the timeline points to compute, None bound is open."""
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+
+
+class TimelineCursor(NamedTuple):
+    """
+        Position of the next timeline page: index of its first point in the dense timeline,
+        quantity vested before it and index of the valuation actual at the previous point.
+    """
+    point_idx: int
+    vested_quantity: int
+    valuation_idx: int
+
+
+class ValuatedTimelinePage(NamedTuple):
+    valuated_timeline: ValuatedTimeline
+    # None for the last page
+    next_cursor: Optional[TimelineCursor]
+
+
+def check_computation_inputs(option_grants: Sequence[AnyOptionGrant], valuations: Sized) -> None:
+    """Check there is something to valuate, `valuations` are of the prices or their dates."""
+    if not option_grants or not valuations:
+        raise ValueError(
+            'At least one grant and one valuation '
+            'must be provided for the computation.'
+        )
 
 
 def get_valuated_vesting_schedule(
-    option_grants: list[OptionGrant],
-    company_valuations: list[CompanyValuation],
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
 ) -> list[VestedEquityValuation]:
-    if not option_grants or not company_valuations:
+    return get_valuated_timeline(
+        option_grants, company_valuations,
+    ).to_vested_equity_valuations()
+
+
+def get_valuated_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> ValuatedTimeline:
+    """
+        Same as `get_valuated_vesting_schedule`, but as `ValuatedTimeline` arrays.
+
+        With the `window` only the timeline points within it are computed,
+        see `form_windowed_vesting_timeline`. Points of other than monthly
+        `granularity` are formed by `form_period_vesting_timeline`.
+    """
+    check_computation_inputs(option_grants, company_valuations)
+
+    return _get_valuated_timeline(
+        option_grants,
+        ValuationIndex.from_company_valuations(company_valuations),
+        window,
+        granularity,
+    )
+
+
+def get_valuated_runs(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> ValuatedRuns:
+    """
+        Same as `get_valuated_timeline`, but points of the same total value are collapsed
+        into runs as they are valuated, so dates are only built for the runs bounds.
+    """
+    check_computation_inputs(option_grants, company_valuations)
+
+    vesting_timeline = form_vesting_timeline(option_grants, window, granularity)
+
+    with timed_stage('valuation'):
+        return _valuate_vesting_timeline_runs(
+            vesting_timeline.month_days(),
+            vesting_timeline.vested_quantities,
+            ValuationIndex.from_company_valuations(company_valuations),
+        )
+
+
+def get_vested_values_asof(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    query_dates: Sequence[date],
+) -> ValuatedTimeline:
+    """
+        Get the value of equity vested by every one of `query_dates` (in the same order)
+        as quantity vested on or before the date multiplied by the stock price at the date.
+
+        Vest events are indexed with prefix sums of their quantities, so every date is
+        answered in O(log n) without forming the monthly timeline.
+    """
+    check_computation_inputs(option_grants, company_valuations)
+
+    with timed_stage('vesting'):
+        vesting_schedule = VESTING_ENGINES[settings.VESTING_ENGINE](option_grants)
+
+    with timed_stage('valuation'):
+        vested_quantity_index = VestedQuantityIndex.from_vesting_schedule(vesting_schedule)
+        valuation_index = ValuationIndex.from_company_valuations(company_valuations)
+        total_values = []
+
+        for query_date in query_dates:
+            query_month_day = to_month_day(query_date)
+            valuation_idx = valuation_index.find_latest_valuation_idx(query_month_day)
+
+            if valuation_idx < 0:
+                raise ValueError(f'Unknown stock price at {query_date}')
+
+            total_values.append(
+                valuation_index.prices[valuation_idx]
+                * vested_quantity_index.find_vested_quantity(query_month_day)
+            )
+
+        return ValuatedTimeline(list(query_dates), total_values)
+
+
+def get_valuated_timeline_page(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    page_size: int,
+    cursor: Optional[TimelineCursor] = None,
+    window: Optional[TimelineWindow] = None,
+) -> ValuatedTimelinePage:
+    """
+        Same as `get_valuated_timeline`, but only up to `page_size` points from the `cursor`
+        (from the window start for the first page) and the cursor of the next page.
+
+        Page is formed as a window of the timeline with the vested quantity and
+        the valuation index resumed from the cursor, so earlier points are not recomputed.
+    """
+    check_computation_inputs(option_grants, company_valuations)
+
+    valuation_index = ValuationIndex.from_company_valuations(company_valuations)
+    window = window or TimelineWindow()
+
+    if cursor is not None and not (
+        cursor.point_idx >= 0
+        and cursor.vested_quantity >= 0
+        and -1 <= cursor.valuation_idx < len(valuation_index.prices)
+    ):
+        raise ValueError('Invalid timeline cursor')
+
+    with timed_stage('vesting'):
+        grants_terms = _get_grants_terms(option_grants)
+        start_date, end_date = _get_timeline_bounds(grants_terms)
+
+        if cursor is not None:
+            page_start_idx, vested_quantity_before, valuation_idx = cursor
+        else:
+            page_start_idx = 0 if window.from_date is None else _find_timeline_date_idx(
+                start_date, end_date, to_month_day(window.from_date),
+            )
+            vested_quantity_before, valuation_idx = None, 0
+
+        page_start_date = _get_timeline_date(start_date, end_date, page_start_idx)
+        # One more point is formed to find out whether there is the next page
+        page_end_date = _get_timeline_date(start_date, end_date, page_start_idx + page_size)
+
+        # Window may start after the timeline, the last point is found for it then
+        if window.from_date is not None:
+            page_start_date = max(page_start_date, to_month_day(window.from_date))
+
+        if window.to_date is not None:
+            page_end_date = min(page_end_date, to_month_day(window.to_date))
+
+        vesting_timeline = _form_windowed_vesting_timeline(
+            grants_terms, start_date, end_date, page_start_date, page_end_date,
+            vested_quantity_before,
+        )
+
+    with timed_stage('valuation'):
+        timeline_dates = vesting_timeline.timeline_dates[:page_size]
+        vested_quantities = vesting_timeline.vested_quantities[:page_size]
+        valuated_timeline = _valuate_vesting_timeline(
+            timeline_dates, vested_quantities, valuation_index, valuation_idx,
+        )
+
+    if len(vesting_timeline.timeline_dates) <= page_size:
+        return ValuatedTimelinePage(valuated_timeline, None)
+
+    return ValuatedTimelinePage(
+        valuated_timeline,
+        TimelineCursor(
+            page_start_idx + page_size,
+            sum(vested_quantities),
+            valuation_index.find_latest_valuation_idx(timeline_dates[-1], max(valuation_idx, 0)),
+        ),
+    )
+
+
+def iter_valuated_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    company_valuations: Sequence[AnyCompanyValuation],
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> Iterator[ValuatedPoint]:
+    """
+        Same as `get_valuated_timeline`, but timeline points are yielded as they are valuated.
+
+        Vesting timeline is formed and checked for the known stock price upfront,
+        so no errors are raised once the iteration is started.
+    """
+    check_computation_inputs(option_grants, company_valuations)
+
+    return _iter_valuated_timeline(
+        option_grants,
+        ValuationIndex.from_company_valuations(company_valuations),
+        window,
+        granularity,
+    )
+
+
+def get_valuated_timelines(
+    holder_option_grants: Mapping[str, Sequence[AnyOptionGrant]],
+    company_valuations: Sequence[AnyCompanyValuation],
+) -> dict[str, ValuatedTimeline]:
+    """
+        Same as `get_valuated_timeline` for grants of every holder,
+        company valuations are sorted and indexed once for the whole batch.
+    """
+    valuation_index = _get_batch_valuation_index(holder_option_grants, company_valuations)
+
+    return {
+        holder_id: _get_valuated_timeline(option_grants, valuation_index)
+        for holder_id, option_grants in holder_option_grants.items()
+    }
+
+
+def iter_valuated_timelines(
+    holder_option_grants: Mapping[str, Sequence[AnyOptionGrant]],
+    company_valuations: Sequence[AnyCompanyValuation],
+) -> Iterator[tuple[str, Iterator[ValuatedPoint]]]:
+    """
+        Same as `get_valuated_timelines`, but timelines of holders are computed one by one
+        and their points are yielded as they are valuated.
+    """
+    valuation_index = _get_batch_valuation_index(holder_option_grants, company_valuations)
+
+    # Every holder timeline has a known stock price when the earliest one has it
+    earliest_start_date = min(
+        grant.start_date
+        for option_grants in holder_option_grants.values()
+        for grant in option_grants
+    )
+
+    if valuation_index.find_latest_valuation_idx(to_month_day(earliest_start_date)) < 0:
+        raise ValueError('Unknown stock price at the start of the timeline')
+
+    return (
+        (holder_id, _iter_valuated_timeline(option_grants, valuation_index))
+        for holder_id, option_grants in holder_option_grants.items()
+    )
+
+
+def _get_batch_valuation_index(
+    holder_option_grants: Mapping[str, Sequence[AnyOptionGrant]],
+    company_valuations: Sequence[AnyCompanyValuation],
+) -> ValuationIndex:
+    if not company_valuations or not holder_option_grants or not all(
+        holder_option_grants.values()
+    ):
         raise ValueError(
-            'At least one grant and one valuation '
+            'At least one grant for every holder and one valuation '
             'must be provided for the computation.'
         )
 
-    vesting_schedule = form_vesting_schedule(option_grants)
+    return ValuationIndex.from_company_valuations(company_valuations)
 
-    vesting_start_date = min(option_grants, key=attrgetter('start_date')).start_date
-    vesting_end_date = max(vesting_schedule)
 
-    vesting_schedule = form_monthly_vesting_timeline(
-        vesting_schedule, vesting_start_date, vesting_end_date,
+def _get_valuated_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    valuation_index: ValuationIndex,
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> ValuatedTimeline:
+    vesting_timeline = form_vesting_timeline(option_grants, window, granularity)
+
+    with timed_stage('valuation'):
+        return _valuate_vesting_timeline(
+            vesting_timeline.month_days(),
+            vesting_timeline.vested_quantities,
+            valuation_index,
+        )
+
+
+def _iter_valuated_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    valuation_index: ValuationIndex,
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> Iterator[ValuatedPoint]:
+    vesting_timeline = form_vesting_timeline(option_grants, window, granularity)
+    timeline_start_date = next(vesting_timeline.month_days(), None)
+
+    if (
+        timeline_start_date is not None
+        and valuation_index.find_latest_valuation_idx(timeline_start_date) < 0
+    ):
+        raise ValueError('Unknown stock price at the start of the timeline')
+
+    return _iter_valuated_vesting_timeline(
+        vesting_timeline.month_days(),
+        vesting_timeline.vested_quantities,
+        valuation_index,
     )
 
-    vested_equity_valuations = form_valuated_vesting_schedule(
-        vesting_schedule, company_valuations,
+
+def form_vesting_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    window: Optional[TimelineWindow] = None,
+    granularity: Granularity = 'monthly',
+) -> Union['VestingTimeline', 'WindowedVestingTimeline']:
+    """
+        Form the timeline points of the grants with quantities vested by every one of them
+        since the previous one, as they are valuated by `get_valuated_timeline`.
+    """
+    if window is not None and granularity == 'monthly':
+        with timed_stage('vesting'):
+            return form_windowed_vesting_timeline(
+                option_grants,
+                None if window.from_date is None else to_month_day(window.from_date),
+                None if window.to_date is None else to_month_day(window.to_date),
+            )
+
+    with timed_stage('vesting'):
+        vesting_schedule = VESTING_ENGINES[settings.VESTING_ENGINE](option_grants)
+
+    with timed_stage('bucketing'):
+        vesting_start_date = min(option_grants, key=attrgetter('start_date')).start_date
+        vesting_end_date = max(vesting_schedule)
+
+        if granularity == 'monthly':
+            return form_dense_monthly_vesting_timeline(
+                vesting_schedule, to_month_day(vesting_start_date), vesting_end_date,
+            )
+
+        # Events are re-bucketed into the periods, so the window is applied afterwards
+        return _restrict_to_window(
+            WindowedVestingTimeline(*form_period_vesting_timeline(
+                vesting_schedule, to_month_day(vesting_start_date), vesting_end_date,
+                granularity,
+            )),
+            window,
+        )
+
+
+def _restrict_to_window(
+    vesting_timeline: 'WindowedVestingTimeline', window: Optional[TimelineWindow],
+) -> 'WindowedVestingTimeline':
+    if window is None:
+        return vesting_timeline
+
+    timeline_dates, vested_quantities = vesting_timeline
+    window_start_idx = 0 if window.from_date is None else bisect_left(
+        timeline_dates, to_month_day(window.from_date),
+    )
+    window_end_idx = len(timeline_dates) if window.to_date is None else bisect_right(
+        timeline_dates, to_month_day(window.to_date),
     )
 
-    return vested_equity_valuations
+    if window_start_idx >= window_end_idx:
+        return WindowedVestingTimeline([], [])
 
+    # Quantity vested before the window is accumulated on its first point
+    window_vested_quantities = vested_quantities[window_start_idx:window_end_idx]
+    window_vested_quantities[0] += sum(vested_quantities[:window_start_idx])
+
+    return WindowedVestingTimeline(
+        timeline_dates[window_start_idx:window_end_idx], window_vested_quantities,
+    )
 
-def form_vesting_schedule(option_grants: list[OptionGrant]) -> dict[date, int]:
+
+def form_vesting_schedule(option_grants: Sequence[AnyOptionGrant]) -> dict[date, int]:
     """
         Return dates-to-quantity when stock options are vested for all provided grants.
         Quantity of stock options from different grants vested on the same date is summed up.
         Dates when no stock options are vested (before the cliff, for example) are not included.
     """
-    date_to_vested_quantity: DefaultDict[date, int] = defaultdict(int)
+    return {
+        to_date(month_day): vested_quantity
+        for month_day, vested_quantity in form_month_day_vesting_schedule(option_grants).items()
+    }
+
+
+def form_month_day_vesting_schedule(
+    option_grants: Sequence[AnyOptionGrant],
+) -> dict[MonthDay, int]:
+    """
+        Same as `form_vesting_schedule`, but dates are `month_calendar.MonthDay` pairs.
+
+        Vesting templates of the grants shapes are memoized in `cache.vesting_template_cache`,
+        so for the known shapes only shifting of their events to the grant start is left.
+    """
+    month_day_to_vested_quantity: DefaultDict[MonthDay, int] = defaultdict(int)
 
     for grant in option_grants:
-        monthly_vested_quantity_f = Fraction(grant.quantity, grant.duration_months)
-        prev_month_decimal_remainder = Fraction(0)
+        vesting_template = _get_vesting_template(
+            grant.quantity, grant.cliff_months, grant.duration_months,
+        )
+        start_month_ordinal, vesting_start_month_day = to_month_day(grant.start_date)
+
+        # Every month has the start day, no need to look for the last day of a shorter month
+        if vesting_start_month_day <= MIN_DAYS_IN_MONTH:
+            for month, vest_quantity in vesting_template:
+                month_day_to_vested_quantity[
+                    start_month_ordinal + month, vesting_start_month_day
+                ] += vest_quantity
+        else:
+            for month, vest_quantity in vesting_template:
+                month_day_to_vested_quantity[
+                    shift_months(start_month_ordinal, month, vesting_start_month_day)
+                ] += vest_quantity
+
+    return dict(month_day_to_vested_quantity)
+
+
+def _get_vesting_template(
+    quantity: int, cliff_months: int, duration_months: int,
+) -> VestingTemplate:
+    """
+        Get the memoized vesting template of the grant shape.
+    """
+    vesting_template_key: VestingTemplateKey = (quantity, cliff_months, duration_months)
+    vesting_template = vesting_template_cache.get(vesting_template_key)
 
-        vesting_start_month_day = grant.start_date.day
-        after_cliff_start_date: date = grant.start_date
+    if vesting_template is None:
+        vesting_template = _form_vesting_template(*vesting_template_key)
+        vesting_template_cache.set(vesting_template_key, vesting_template)
 
-        if grant.cliff_months:
-            cliff_date = _get_next_vesting_date(
-                grant.start_date, grant.cliff_months, vesting_start_month_day
-            )
+    return vesting_template
 
-            cliff_vest_quantity, prev_month_decimal_remainder = _calculate_vested_quantity(
-                monthly_vested_quantity_f, prev_month_decimal_remainder,
-                months=grant.cliff_months
-            )
 
-            if cliff_vest_quantity:
-                date_to_vested_quantity[cliff_date] += cliff_vest_quantity
+def _form_vesting_template(
+    quantity: int, cliff_months: int, duration_months: int,
+) -> VestingTemplate:
+    """
+        Get months from the grant start with quantities vested on them,
+        which is the same for all grants of the same shape.
+    """
+    vesting_template = []
 
-            after_cliff_start_date = cliff_date
+    # The cliff date vests everything accumulated up to it in a lump sum,
+    # every next month vests the difference between cumulative amounts
+    first_vesting_month = max(cliff_months, 1)
+    prev_cumulative_vested_quantity = 0
 
-        vesting_end_date = _get_next_vesting_date(
-            grant.start_date, grant.duration_months, vesting_start_month_day
-        )
+    for month in range(first_vesting_month, duration_months + 1):
+        cumulative_vested_quantity = _calculate_vested_quantity(quantity, duration_months, month)
+        vest_quantity = cumulative_vested_quantity - prev_cumulative_vested_quantity
+        prev_cumulative_vested_quantity = cumulative_vested_quantity
 
-        timeline_date = _get_next_vesting_date(
-            after_cliff_start_date, 1, vesting_start_month_day
-        )
+        if vest_quantity:
+            vesting_template.append((month, vest_quantity))
+
+    return tuple(vesting_template)
 
-        while timeline_date <= vesting_end_date:
-            vest_quantity, prev_month_decimal_remainder = _calculate_vested_quantity(
-                monthly_vested_quantity_f, prev_month_decimal_remainder,
-            )
 
-            if vest_quantity:
-                date_to_vested_quantity[timeline_date] += vest_quantity
+VESTING_ENGINES: dict[str, Callable[[Sequence[AnyOptionGrant]], dict[MonthDay, int]]] = {
+    'python': form_month_day_vesting_schedule,
+    'numpy': form_vectorized_month_day_vesting_schedule,
+}
 
-            timeline_date = _get_next_vesting_date(timeline_date, 1, vesting_start_month_day)
 
-    return dict(date_to_vested_quantity)
+def _calculate_vested_quantity(quantity: int, duration_months: int, months: int) -> int:
+    """
+        Get the whole number of stock options vested in the first `months` of the grant.
+
+        Equals to carrying the fractional remainder of `quantity / duration_months`
+        from month to month, so the vested amount of any month is computed in O(1).
+    """
+    return quantity * months // duration_months
 
 
-def _get_next_vesting_date(from_date: date, months: int, initial_day: int) -> date:
+class VestingTimeline(NamedTuple):
     """
-        Get date in `months` from `from_date` with also trying
-        to set the `initial_day` for months when it is possible or
-        the last month day when there is not such day (e.g. not every month has 31 days)
+        Dense monthly vesting timeline with quantities vested by every timeline point.
+
+        Points are start date, first days of every next month up to the end date and
+        the end date itself, i-th month start after the start date is at index i.
+        Quantities vested in the end month before the end date are accumulated
+        on the first day of the following month, which is then the last point.
     """
-    return from_date + relativedelta(months=+months, day=initial_day)
+    start_date: MonthDay
+    end_date: MonthDay
+    vested_quantities: list[int]
+
+    def month_days(self) -> Iterator[MonthDay]:
+        yield self.start_date
+
+        end_month_ordinal = self.end_date[0]
 
+        for month_ordinal in range(self.start_date[0] + 1, end_month_ordinal + 1):
+            yield month_ordinal, 1
 
-def _calculate_vested_quantity(
-    monthly_vested_quantity: Fraction,
-    prev_month_remainder: Fraction,
-    months: int = 1
-) -> tuple[int, Fraction]:
-    quantity_to_vest = monthly_vested_quantity * months + prev_month_remainder
-    vested_quantity = int(quantity_to_vest)
-    not_vested_remainder = quantity_to_vest - vested_quantity
-    return vested_quantity, not_vested_remainder
+        if _has_separate_end_point(self.start_date, self.end_date):
+            yield self.end_date
+
+        if len(self.vested_quantities) > _get_end_date_idx(self.start_date, self.end_date) + 1:
+            yield end_month_ordinal + 1, 1
+
+
+class VestedQuantityIndex(NamedTuple):
+    """
+        Vest event dates in ascending order with quantities vested on or before
+        every one of them, for the as-of lookup of the vested quantity.
+    """
+    vest_dates: list[MonthDay]
+    cumulative_vested_quantities: list[int]
+
+    @classmethod
+    def from_vesting_schedule(cls, vesting_schedule: dict[MonthDay, int]) -> 'VestedQuantityIndex':
+        sorted_vesting_schedule = sorted(vesting_schedule.items())
+        return cls(
+            [vest_date for vest_date, _ in sorted_vesting_schedule],
+            list(accumulate(vest_quantity for _, vest_quantity in sorted_vesting_schedule)),
+        )
+
+    def find_vested_quantity(self, timeline_date: MonthDay) -> int:
+        """Get quantity vested on or before the `timeline_date`."""
+        vest_idx = bisect_right(self.vest_dates, timeline_date) - 1
+        return self.cumulative_vested_quantities[vest_idx] if vest_idx >= 0 else 0
+
+
+def _has_separate_end_point(start_date: MonthDay, end_date: MonthDay) -> bool:
+    return end_date[1] != 1 and end_date != start_date
+
+
+def _get_end_date_idx(start_date: MonthDay, end_date: MonthDay) -> int:
+    return end_date[0] - start_date[0] + _has_separate_end_point(start_date, end_date)
 
 
 def form_monthly_vesting_timeline(
@@ -121,40 +600,317 @@ def form_monthly_vesting_timeline(
         On the first day of the month accumulates all vested stock options for the past month
         (except start and end dates).
     """
-    monthly_vesting_schedule = defaultdict(int, vesting_schedule)
+    vesting_timeline = form_dense_monthly_vesting_timeline(
+        {
+            to_month_day(timeline_date): vested_quantity
+            for timeline_date, vested_quantity in vesting_schedule.items()
+        },
+        to_month_day(start_date), to_month_day(end_date),
+    )
+
+    return {
+        to_date(month_day): vested_quantity
+        for month_day, vested_quantity
+        in zip(vesting_timeline.month_days(), vesting_timeline.vested_quantities)
+    }
+
+
+def form_dense_monthly_vesting_timeline(
+    vesting_schedule: dict[MonthDay, int],
+    start_date: MonthDay, end_date: MonthDay,
+) -> VestingTimeline:
+    """
+        Same as `form_monthly_vesting_timeline`, but quantities are written straight into
+        the ordered `VestingTimeline` array in one pass over the schedule.
+
+        Schedule dates are expected to be within start and end dates.
+    """
+    start_month_ordinal = start_date[0]
+    end_date_idx = _get_end_date_idx(start_date, end_date)
+    after_end_month_start_idx = end_date_idx + 1
+
+    # Reserve the point after the end date, it is dropped if nothing is accumulated on it
+    vested_quantities = [0] * (after_end_month_start_idx + 1)
+    has_after_end_month_start = False
+
+    for timeline_date, date_vested_quantity in vesting_schedule.items():
+        month_ordinal, day = timeline_date
+
+        if timeline_date == start_date:
+            timeline_date_idx = 0
+        elif timeline_date == end_date:
+            timeline_date_idx = end_date_idx
+        elif day == 1:
+            timeline_date_idx = month_ordinal - start_month_ordinal
+        else:
+            # Accumulate on the first day of the next month
+            timeline_date_idx = month_ordinal - start_month_ordinal + 1
+
+            if timeline_date_idx >= end_date_idx and month_ordinal == end_date[0]:
+                timeline_date_idx = after_end_month_start_idx
+                has_after_end_month_start = True
+
+        vested_quantities[timeline_date_idx] += date_vested_quantity
+
+    if not has_after_end_month_start:
+        vested_quantities.pop()
+
+    return VestingTimeline(start_date, end_date, vested_quantities)
+
+
+class WindowedVestingTimeline(NamedTuple):
+    """
+        Timeline points with quantities vested by every one of them since the previous one,
+        as `VestingTimeline` within a window or of other granularity. Quantity vested
+        before the window is accumulated on its first point.
+    """
+    timeline_dates: list[MonthDay]
+    vested_quantities: list[int]
+
+    def month_days(self) -> Iterator[MonthDay]:
+        return iter(self.timeline_dates)
+
+
+def form_windowed_vesting_timeline(
+    option_grants: Sequence[AnyOptionGrant],
+    from_date: Optional[MonthDay],
+    to_date: Optional[MonthDay],
+    vested_quantity_before: Optional[int] = None,
+) -> WindowedVestingTimeline:
+    """
+        Same as `form_dense_monthly_vesting_timeline` of the grants vesting schedule with
+        only the points from `from_date` to `to_date` inclusive (None bound is open).
+
+        Quantity vested before the window is computed in closed form for every grant,
+        unless it is known as `vested_quantity_before`, and only vest events within
+        the window are formed, so the cost depends on the window length rather than
+        on the grant durations.
+    """
+    grants_terms = _get_grants_terms(option_grants)
+    start_date, end_date = _get_timeline_bounds(grants_terms)
+
+    return _form_windowed_vesting_timeline(
+        grants_terms, start_date, end_date, from_date, to_date, vested_quantity_before,
+    )
+
+
+def _form_windowed_vesting_timeline(
+    grants_terms: Sequence['GrantTerms'],
+    start_date: MonthDay,
+    end_date: MonthDay,
+    from_date: Optional[MonthDay],
+    to_date: Optional[MonthDay],
+    vested_quantity_before: Optional[int],
+) -> WindowedVestingTimeline:
+    after_end_month_start = (end_date[0] + 1, 1)
+
+    timeline_dates = _get_timeline_dates_within(
+        start_date, end_date,
+        _has_after_end_month_start(grants_terms, end_date),
+        from_date or start_date, to_date or after_end_month_start,
+    )
+
+    if not timeline_dates:
+        return WindowedVestingTimeline([], [])
+
+    # Everything is vested by the point after the end date, which is the only one then
+    if timeline_dates[0] == after_end_month_start:
+        return WindowedVestingTimeline(
+            timeline_dates, [sum(quantity for _, quantity, _, _ in grants_terms)],
+        )
+
+    window_start_date, window_end_date = timeline_dates[0], timeline_dates[-1]
+    prev_timeline_date = _get_prev_timeline_date(start_date, window_start_date)
+    timeline_date_idx = {timeline_date: idx for idx, timeline_date in enumerate(timeline_dates)}
+    vested_quantities = [0] * len(timeline_dates)
+
+    if vested_quantity_before is not None:
+        vested_quantities[0] = vested_quantity_before
+
+    for grant_start, quantity, cliff_months, duration_months in grants_terms:
+        start_month_ordinal, start_day = grant_start
+        prev_months = (
+            _count_grant_months(grant_start, prev_timeline_date)
+            if prev_timeline_date is not None else 0
+        )
+
+        if vested_quantity_before is None:
+            vested_quantities[0] += _calculate_grant_vested_quantity(
+                quantity, cliff_months, duration_months, prev_months,
+            )
+
+        for month in range(
+            max(prev_months + 1, cliff_months, 1),
+            min(_count_grant_months(grant_start, window_end_date), duration_months) + 1,
+        ):
+            vest_quantity = _calculate_grant_vested_quantity(
+                quantity, cliff_months, duration_months, month,
+            ) - _calculate_grant_vested_quantity(
+                quantity, cliff_months, duration_months, month - 1,
+            )
+            vest_date = shift_months(start_month_ordinal, month, start_day)
+            vest_timeline_date_idx = timeline_date_idx.get(
+                _get_accumulating_timeline_date(vest_date, start_date, end_date)
+            )
+
+            # Vests of the end month before the end date may fall after the window end
+            if vest_quantity and vest_timeline_date_idx is not None:
+                vested_quantities[vest_timeline_date_idx] += vest_quantity
+
+    return WindowedVestingTimeline(timeline_dates, vested_quantities)
+
+
+GrantTerms = tuple[MonthDay, int, int, int]
+
+
+def _get_grants_terms(option_grants: Sequence[AnyOptionGrant]) -> list[GrantTerms]:
+    return [
+        (to_month_day(grant.start_date), grant.quantity, grant.cliff_months, grant.duration_months)
+        for grant in option_grants
+    ]
+
+
+def _get_timeline_bounds(grants_terms: Sequence[GrantTerms]) -> tuple[MonthDay, MonthDay]:
+    """Get start and end dates of the grants timeline, the end is the last vest date."""
+    start_date = min(grant_start for grant_start, *_ in grants_terms)
+    end_date = max(
+        shift_months(grant_start[0], duration_months, grant_start[1])
+        for grant_start, _, _, duration_months in grants_terms
+    )
+    return start_date, end_date
+
+
+def _get_timeline_date(start_date: MonthDay, end_date: MonthDay, point_idx: int) -> MonthDay:
+    """
+        Get the date of the `VestingTimeline` point by its index, points beyond
+        the timeline are month starts after it.
+    """
+    if point_idx == 0:
+        return start_date
+
+    month_ordinal = start_date[0] + point_idx
+
+    if month_ordinal <= end_date[0] or not _has_separate_end_point(start_date, end_date):
+        return month_ordinal, 1
+
+    return end_date if month_ordinal == end_date[0] + 1 else (month_ordinal - 1, 1)
+
+
+def _find_timeline_date_idx(
+    start_date: MonthDay, end_date: MonthDay, timeline_date: MonthDay,
+) -> int:
+    """Get the index of the first `VestingTimeline` point on or after the `timeline_date`."""
+    if timeline_date <= start_date:
+        return 0
+
+    month_ordinal, day = timeline_date
+    month_start_ordinal = month_ordinal + (day > 1)
+
+    if month_start_ordinal <= end_date[0]:
+        return month_start_ordinal - start_date[0]
+
+    end_date_idx = _get_end_date_idx(start_date, end_date)
+
+    return end_date_idx if timeline_date <= end_date else end_date_idx + 1
+
+
+def _get_timeline_dates_within(
+    start_date: MonthDay,
+    end_date: MonthDay,
+    has_after_end_month_start: bool,
+    from_date: MonthDay,
+    to_date: MonthDay,
+) -> list[MonthDay]:
+    """Get `VestingTimeline.month_days` from `from_date` to `to_date` inclusive."""
+    timeline_dates = []
 
-    # Add key for every month start in the overall vesting period
-    start_date_month_start = start_date.replace(day=1)
+    if from_date <= start_date <= to_date:
+        timeline_dates.append(start_date)
 
-    monthly_timeline_rrule = rrule(
-        MONTHLY,
-        dtstart=datetime.combine(start_date_month_start, time.min),
-        until=datetime.combine(end_date, time.max),
+    # Month start is within the window from its month or the next one
+    first_month_ordinal = max(start_date[0] + 1, from_date[0] + (from_date[1] > 1))
+    last_month_ordinal = min(end_date[0], to_date[0])
+    timeline_dates.extend(
+        (month_ordinal, 1) for month_ordinal in range(first_month_ordinal, last_month_ordinal + 1)
     )
 
-    for dt in monthly_timeline_rrule[1:]:
-        monthly_vesting_schedule[dt.date()] += 0
+    if _has_separate_end_point(start_date, end_date) and from_date <= end_date <= to_date:
+        timeline_dates.append(end_date)
 
-    # Add keys for start and end dates
-    monthly_vesting_schedule[start_date] += 0
-    monthly_vesting_schedule[end_date] += 0
+    if has_after_end_month_start and from_date <= (end_date[0] + 1, 1) <= to_date:
+        timeline_dates.append((end_date[0] + 1, 1))
 
-    # Rearrange vesting schedule date for the first day of the next month
-    for timeline_date, date_vested_quantity in list(monthly_vesting_schedule.items()):
-        if timeline_date.day == 1 or timeline_date == start_date or timeline_date == end_date:
-            continue
+    return timeline_dates
 
-        next_month_start_date = (timeline_date + relativedelta(months=+1)).replace(day=1)
 
-        monthly_vesting_schedule[next_month_start_date] += date_vested_quantity
-        del monthly_vesting_schedule[timeline_date]
+def _get_prev_timeline_date(
+    start_date: MonthDay, timeline_date: MonthDay,
+) -> Optional[MonthDay]:
+    """Get the timeline point before the month start or the end date point."""
+    if timeline_date == start_date:
+        return None
 
-    return dict(monthly_vesting_schedule)
+    month_ordinal, day = timeline_date
+    prev_month_ordinal = month_ordinal - 1 if day == 1 else month_ordinal
+
+    return (prev_month_ordinal, 1) if prev_month_ordinal > start_date[0] else start_date
+
+
+def _get_accumulating_timeline_date(
+    vest_date: MonthDay, start_date: MonthDay, end_date: MonthDay,
+) -> MonthDay:
+    """
+        Get the timeline point the vest is accumulated on, as in the dense timeline:
+        vests of the end month before the end date are on the point after the end date.
+    """
+    month_ordinal, day = vest_date
+
+    if vest_date == start_date or vest_date == end_date or day == 1:
+        return vest_date
+
+    return month_ordinal + 1, 1
+
+
+def _has_after_end_month_start(grants_terms: Sequence[GrantTerms], end_date: MonthDay) -> bool:
+    """Check if something is vested in the end month between its first day and the end date."""
+    end_month_ordinal, end_day = end_date
+
+    for (start_month_ordinal, start_day), quantity, cliff_months, duration_months in grants_terms:
+        month = end_month_ordinal - start_month_ordinal
+        vest_day = min(start_day, days_in_month(end_month_ordinal))
+
+        if 1 < vest_day < end_day and _calculate_grant_vested_quantity(
+            quantity, cliff_months, duration_months, month,
+        ) != _calculate_grant_vested_quantity(
+            quantity, cliff_months, duration_months, month - 1,
+        ):
+            return True
+
+    return False
+
+
+def _count_grant_months(grant_start: MonthDay, timeline_date: MonthDay) -> int:
+    """Get the number of monthly anniversaries of the grant start on or before the date."""
+    start_month_ordinal, start_day = grant_start
+    month_ordinal, day = timeline_date
+    months = month_ordinal - start_month_ordinal
+
+    return months if day >= min(start_day, days_in_month(month_ordinal)) else months - 1
+
+
+def _calculate_grant_vested_quantity(
+    quantity: int, cliff_months: int, duration_months: int, months: int,
+) -> int:
+    """Same as `_calculate_vested_quantity`, but nothing is vested before the cliff."""
+    if months <= 0 or months < cliff_months:
+        return 0
+
+    return _calculate_vested_quantity(quantity, duration_months, min(months, duration_months))
 
 
 def form_valuated_vesting_schedule(
     vesting_schedule: dict[date, int],
-    company_valuations: list[CompanyValuation],
+    company_valuations: Sequence[AnyCompanyValuation],
 ) -> list[VestedEquityValuation]:
     """
         By vesting schedule and company_valuations provide equity value timeline.
@@ -162,52 +918,90 @@ def form_valuated_vesting_schedule(
         For each date take the last company valuation price prior to the date and
         multiply it with the cumulative vested stock options quantity.
     """
-    sorted_vesting_schedule = sorted(vesting_schedule.items())
-    sorted_valuations = sorted(company_valuations, key=lambda cv: cv.valuation_date)
-
-    timeline_current_valuation = None
-
-    # Take the last actual valuation before the start of the timeline
-    earliest_vesting_date = sorted_vesting_schedule[0][0]
+    sorted_vesting_schedule = sorted(
+        (to_month_day(timeline_date), vested_quantity)
+        for timeline_date, vested_quantity in vesting_schedule.items()
+    )
 
-    for valuation in sorted_valuations:
-        if valuation.valuation_date > earliest_vesting_date:
-            break
+    return _valuate_vesting_timeline(
+        [timeline_date for timeline_date, _ in sorted_vesting_schedule],
+        [vested_quantity for _, vested_quantity in sorted_vesting_schedule],
+        ValuationIndex.from_company_valuations(company_valuations),
+    ).to_vested_equity_valuations()
 
-        timeline_current_valuation = valuation
 
-    if not timeline_current_valuation:
-        raise ValueError('Unknown stock price at the start of the timeline')
+def _valuate_vesting_timeline(
+    timeline_dates: Iterable[MonthDay],
+    vested_quantities: Iterable[int],
+    valuation_index: ValuationIndex,
+    valuation_idx: int = 0,
+) -> ValuatedTimeline:
+    """
+        Provide equity value timeline for vesting schedule points ordered by date.
+    """
+    valuated_dates: list[date] = []
+    total_values: list[Decimal] = []
+
+    for timeline_date, total_value in _iter_valuated_vesting_timeline(
+        timeline_dates, vested_quantities, valuation_index, valuation_idx,
+    ):
+        valuated_dates.append(timeline_date)
+        total_values.append(total_value)
+
+    return ValuatedTimeline(valuated_dates, total_values)
+
+
+def _valuate_vesting_timeline_runs(
+    timeline_dates: Iterable[MonthDay],
+    vested_quantities: Iterable[int],
+    valuation_index: ValuationIndex,
+) -> ValuatedRuns:
+    run_start_dates: list[MonthDay] = []
+    run_end_dates: list[MonthDay] = []
+    total_values: list[Decimal] = []
+    overall_vested_quantity = 0
+    prices = valuation_index.prices
+    prev_valuation_idx = -1
+
+    for (timeline_date, valuation_idx), last_month_vested_quantity in zip(
+        join_asof(timeline_dates, valuation_index), vested_quantities,
+    ):
+        if valuation_idx < 0:
+            raise ValueError('Unknown stock price at the start of the timeline')
+
+        # Value is the same while neither the quantity nor the price changes
+        if last_month_vested_quantity or valuation_idx != prev_valuation_idx:
+            overall_vested_quantity += last_month_vested_quantity
+            total_value = prices[valuation_idx] * overall_vested_quantity
+            prev_valuation_idx = valuation_idx
+
+            if not total_values or total_value != total_values[-1]:
+                run_start_dates.append(timeline_date)
+                run_end_dates.append(timeline_date)
+                total_values.append(total_value)
+                continue
+
+        run_end_dates[-1] = timeline_date
+
+    return ValuatedRuns(
+        list(map(to_date, run_start_dates)), list(map(to_date, run_end_dates)), total_values,
+    )
 
-    try:
-        timeline_next_valuation: Optional[CompanyValuation] = sorted_valuations[1]
-        timeline_next_valuation_idx = 1
-    except IndexError:
-        # Only one valuation is provided
-        timeline_next_valuation = None
-        timeline_next_valuation_idx = -1
 
-    # Calculate equity valuation by last valuation price at every schedule point
-    valuated_vesting_schedule: list[VestedEquityValuation] = []
+def _iter_valuated_vesting_timeline(
+    timeline_dates: Iterable[MonthDay],
+    vested_quantities: Iterable[int],
+    valuation_index: ValuationIndex,
+    valuation_idx: int = 0,
+) -> Iterator[ValuatedPoint]:
     overall_vested_quantity = 0
+    prices = valuation_index.prices
 
-    for timeline_date, last_month_vested_quantity in sorted_vesting_schedule:
-        if timeline_next_valuation and timeline_date >= timeline_next_valuation.valuation_date:
-            timeline_current_valuation = timeline_next_valuation
-
-            try:
-                timeline_next_valuation_idx += 1
-                timeline_next_valuation = sorted_valuations[timeline_next_valuation_idx]
-            except IndexError:
-                timeline_next_valuation = None
-                timeline_next_valuation_idx = -1
+    for (timeline_date, valuation_idx), last_month_vested_quantity in zip(
+        join_asof(timeline_dates, valuation_index, valuation_idx), vested_quantities,
+    ):
+        if valuation_idx < 0:
+            raise ValueError('Unknown stock price at the start of the timeline')
 
         overall_vested_quantity += last_month_vested_quantity
-        valuated_vesting_schedule.append(
-            VestedEquityValuation(
-                date_=timeline_date,
-                total_value=timeline_current_valuation.price * overall_vested_quantity,
-            )
-        )
-
-    return valuated_vesting_schedule
+        yield to_date(timeline_date), prices[valuation_idx] * overall_vested_quantity
@@ -0,0 +1,240 @@
+"""
+Synthetic cap tables for load tests and benchmarks.
+
+Grants are shaped like the real ones: employees are hired in waves, most of them
+on the 1st of the month with the standard 1 year cliff and 4 years vesting, some
+on month ends, with shorter cliffs or no cliff at all, and long-serving employees
+get yearly refresh grants. Valuations form a long price history since the company
+foundation.
+
+The same seed always gives the same cap table. Grants and valuations are generated
+lazily, so the files of any size are streamed without holding them in memory:
+
+    python -m benchmarks.cap_table --employees 1000000 --format ndjson --output cap_table.ndjson
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Iterator, NamedTuple, Optional, TextIO
+
+from app.schemas import CompanyValuationTerms, OptionGrantTerms, format_date
+from app.services.month_calendar import days_in_month, shift_months, to_date, to_month_day
+
+COMPANY_FOUNDATION_DATE = date(2010, 1, 1)
+
+FORMATS = ('json', 'columnar', 'ndjson')
+
+# (months, weight) of the grant terms
+_INITIAL_CLIFFS = ((12, 70), (0, 15), (6, 10), (3, 5))
+_INITIAL_DURATIONS = ((48, 80), (36, 10), (60, 10))
+_REFRESH_DURATION_MONTHS = 48
+
+# Hire dates are scattered around the wave dates with this deviation
+_HIRING_WAVE_DEVIATION_DAYS = 45
+
+
+class CapTableShape(NamedTuple):
+    employees: int = 1000
+    valuations: int = 120
+    years: int = 10
+    hiring_waves: int = 8
+    # Chance of a refresh grant on every work anniversary
+    refresh_grant_probability: float = 0.5
+    # Share of hires starting on the last day of a month
+    month_end_start_share: float = 0.1
+
+    @property
+    def end_date(self) -> date:
+        return to_date((to_month_day(COMPANY_FOUNDATION_DATE)[0] + self.years * 12, 1))
+
+
+def iter_option_grants(shape: CapTableShape, seed: int = 0) -> Iterator[OptionGrantTerms]:
+    rng = random.Random(f'{seed}:option_grants')
+    first_hire_day = COMPANY_FOUNDATION_DATE.toordinal() + 30
+    last_hire_day = shape.end_date.toordinal() - 1
+    hiring_wave_days = [
+        rng.randint(first_hire_day, last_hire_day) for _ in range(max(shape.hiring_waves, 1))
+    ]
+
+    for _ in range(shape.employees):
+        hire_day = min(max(
+            round(rng.gauss(rng.choice(hiring_wave_days), _HIRING_WAVE_DEVIATION_DAYS)),
+            first_hire_day,
+        ), last_hire_day)
+        start_month_ordinal, start_day = to_month_day(date.fromordinal(hire_day))
+
+        if rng.random() < shape.month_end_start_share:
+            start_day = days_in_month(start_month_ordinal)
+        elif rng.random() < 0.7:
+            start_day = 1
+
+        duration_months = _choose_weighted(rng, _INITIAL_DURATIONS)
+        quantity = max(round(rng.lognormvariate(8, 1)), 1)
+
+        yield OptionGrantTerms(
+            quantity=quantity,
+            start_date=to_date((start_month_ordinal, start_day)),
+            cliff_months=min(_choose_weighted(rng, _INITIAL_CLIFFS), duration_months),
+            duration_months=duration_months,
+        )
+
+        tenure_years = int(rng.expovariate(1 / 3))
+
+        for year in range(1, tenure_years + 1):
+            refresh_start_date = to_date(shift_months(start_month_ordinal, year * 12, start_day))
+
+            if refresh_start_date >= shape.end_date:
+                break
+
+            if rng.random() < shape.refresh_grant_probability:
+                yield OptionGrantTerms(
+                    quantity=max(round(quantity * rng.uniform(0.1, 0.5)), 1),
+                    start_date=refresh_start_date,
+                    cliff_months=0,
+                    duration_months=_REFRESH_DURATION_MONTHS,
+                )
+
+
+def iter_company_valuations(
+    shape: CapTableShape, seed: int = 0,
+) -> Iterator[CompanyValuationTerms]:
+    """Valuations in the date order, the first one is on the company foundation date."""
+    rng = random.Random(f'{seed}:company_valuations')
+    first_day = COMPANY_FOUNDATION_DATE.toordinal()
+    valuation_interval_days = (shape.end_date.toordinal() - first_day) / max(shape.valuations, 1)
+    price = 1.0
+
+    for valuation_idx in range(shape.valuations):
+        valuation_day = first_day + int(
+            valuation_idx * valuation_interval_days
+            + (rng.uniform(0, valuation_interval_days) if valuation_idx else 0)
+        )
+        yield CompanyValuationTerms(
+            price=max(Decimal(f'{price:.2f}'), Decimal('0.01')),
+            valuation_date=date.fromordinal(valuation_day),
+        )
+        price *= math.exp(rng.gauss(0.01, 0.08))
+
+
+def write_cap_table(
+    output_file: TextIO, shape: CapTableShape, seed: int = 0, output_format: str = 'json',
+) -> None:
+    """
+        Write the cap table as a `vested_value` payload (`json`), `vested_value/columnar`
+        payload (`columnar`) or lines of single grants and valuations (`ndjson`).
+    """
+    if output_format == 'json':
+        output_file.write('{"option_grants":[')
+        _write_items(output_file, map(_dump_option_grant, iter_option_grants(shape, seed)))
+        output_file.write('],"company_valuations":[')
+        _write_items(
+            output_file, map(_dump_company_valuation, iter_company_valuations(shape, seed)),
+        )
+        output_file.write(']}\n')
+    elif output_format == 'columnar':
+        # Generation is deterministic, so it is repeated for every column instead of storing them
+        output_file.write('{"option_grants":{')
+        _write_columns(output_file, lambda: iter_option_grants(shape, seed), {
+            'quantities': lambda grant: grant.quantity,
+            'start_dates': lambda grant: format_date(grant.start_date),
+            'cliff_months': lambda grant: grant.cliff_months,
+            'duration_months': lambda grant: grant.duration_months,
+        })
+        output_file.write('},"company_valuations":{')
+        _write_columns(output_file, lambda: iter_company_valuations(shape, seed), {
+            'prices': lambda cv: float(cv.price),
+            'valuation_dates': lambda cv: format_date(cv.valuation_date),
+        })
+        output_file.write('}}\n')
+    elif output_format == 'ndjson':
+        for grant in iter_option_grants(shape, seed):
+            output_file.write(f'{{"option_grant":{_dump_option_grant(grant)}}}\n')
+
+        for cv in iter_company_valuations(shape, seed):
+            output_file.write(f'{{"company_valuation":{_dump_company_valuation(cv)}}}\n')
+    else:
+        raise ValueError(f'Unknown cap table format: {output_format}')
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    default_shape = CapTableShape()
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--employees', type=int, default=default_shape.employees)
+    parser.add_argument('--valuations', type=int, default=default_shape.valuations)
+    parser.add_argument('--years', type=int, default=default_shape.years)
+    parser.add_argument('--hiring-waves', type=int, default=default_shape.hiring_waves)
+    parser.add_argument(
+        '--refresh-grant-probability', type=float, default=default_shape.refresh_grant_probability,
+    )
+    parser.add_argument(
+        '--month-end-start-share', type=float, default=default_shape.month_end_start_share,
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=FORMATS, default='json')
+    parser.add_argument('--output', help='file to write to, stdout by default')
+
+    args = parser.parse_args(argv)
+    shape = CapTableShape(
+        employees=args.employees,
+        valuations=args.valuations,
+        years=args.years,
+        hiring_waves=args.hiring_waves,
+        refresh_grant_probability=args.refresh_grant_probability,
+        month_end_start_share=args.month_end_start_share,
+    )
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            write_cap_table(output_file, shape, args.seed, args.format)
+    else:
+        write_cap_table(sys.stdout, shape, args.seed, args.format)
+
+    return 0
+
+
+def _choose_weighted(rng: random.Random, weighted_values: tuple[tuple[int, int], ...]) -> int:
+    return rng.choices(
+        [value for value, _ in weighted_values],
+        [weight for _, weight in weighted_values],
+    )[0]
+
+
+def _dump_option_grant(grant: OptionGrantTerms) -> str:
+    return (
+        f'{{"quantity":{grant.quantity},"start_date":"{format_date(grant.start_date)}",'
+        f'"cliff_months":{grant.cliff_months},"duration_months":{grant.duration_months}}}'
+    )
+
+
+def _dump_company_valuation(cv: CompanyValuationTerms) -> str:
+    return f'{{"price":{cv.price},"valuation_date":"{format_date(cv.valuation_date)}"}}'
+
+
+def _write_items(output_file: TextIO, items: Iterator[str]) -> None:
+    for item_idx, item in enumerate(items):
+        if item_idx:
+            output_file.write(',')
+
+        output_file.write(item)
+
+
+def _write_columns(
+    output_file: TextIO,
+    iter_rows: Callable[[], Iterator],
+    columns: dict[str, Callable],
+) -> None:
+    for column_idx, (column, get_value) in enumerate(columns.items()):
+        if column_idx:
+            output_file.write(',')
+
+        output_file.write(f'"{column}":[')
+        _write_items(output_file, (json.dumps(get_value(row)) for row in iter_rows()))
+        output_file.write(']')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Stage-level benchmarks of the vesting pipeline.
+
+For every case of the parameter grid the pipeline stages are timed in-process,
+and the whole request is timed through the HTTP app. Results are written as JSON
+and can be compared with a stored baseline to flag slowdowns:
+
+    python -m benchmarks.pipeline run --output results.json
+    python -m benchmarks.pipeline run --output results.json --baseline baseline.json
+    python -m benchmarks.pipeline compare baseline.json results.json
+
+Run from the equity_calculator directory, nothing is fetched over the network.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.api.encoders import encode_valuated_timeline
+from app.api.v1.timelines import EquityValuationRequest
+from app.core.config import settings
+from app.main import create_app
+from app.schemas import CompanyValuationTerms, OptionGrantTerms
+from app.services.cache import (LRUCache, formatted_date_cache, parsed_date_cache, result_cache,
+                                vesting_template_cache)
+from app.services.month_calendar import days_in_month, to_date, to_month_day
+from app.services.valuation_index import ValuationIndex
+from app.services.vesting_calculator import (VESTING_ENGINES, _valuate_vesting_timeline,
+                                             form_dense_monthly_vesting_timeline)
+
+
+class BenchmarkCase(NamedTuple):
+    grants: int
+    duration_months: int
+    valuations: int
+    # `any` days up to the 28th or `month_end` days from the 29th, which need clamping
+    start_days: str
+
+    @property
+    def name(self) -> str:
+        return ','.join(f'{field}={value}' for field, value in self._asdict().items())
+
+
+# Every parameter of the grid is varied around the default case one at a time,
+# a full product of the largest values would run for hours
+DEFAULT_CASE = BenchmarkCase(grants=1000, duration_months=48, valuations=100, start_days='any')
+
+GRID: dict[str, tuple] = {
+    'grants': (1, 100, 1000, 10_000, 100_000),
+    'duration_months': (12, 48, 120, 600),
+    'valuations': (1, 100, 10_000),
+    'start_days': ('any', 'month_end'),
+}
+
+QUICK_GRID: dict[str, tuple] = {
+    'grants': (1, 100, 1000),
+    'duration_months': (12, 48, 120),
+    'valuations': (1, 100),
+    'start_days': ('any', 'month_end'),
+}
+
+# Grants start within 5 years from this month
+_FIRST_START_MONTH_ORDINAL = 2015 * 12
+_START_MONTHS = 5 * 12
+
+# Slowdowns below this are noise whatever the ratio is
+_MIN_SLOWDOWN_SECONDS = 0.0005
+
+StageTimings = dict[str, dict[str, float]]
+
+
+def iter_benchmark_cases(grid: dict[str, tuple]) -> Iterator[BenchmarkCase]:
+    seen_cases = set()
+
+    for field, values in grid.items():
+        for value in values:
+            case = DEFAULT_CASE._replace(**{field: value})
+
+            if case not in seen_cases:
+                seen_cases.add(case)
+                yield case
+
+
+def generate_case_data(
+    case: BenchmarkCase, seed: int = 0,
+) -> tuple[list[OptionGrantTerms], list[CompanyValuationTerms]]:
+    rng = random.Random(f'{seed}:{case.name}')
+    option_grants = []
+
+    for _ in range(case.grants):
+        start_month_ordinal = _FIRST_START_MONTH_ORDINAL + rng.randrange(_START_MONTHS)
+        start_day = (
+            rng.randint(1, 28) if case.start_days == 'any'
+            else min(rng.randint(29, 31), days_in_month(start_month_ordinal))
+        )
+        option_grants.append(OptionGrantTerms(
+            quantity=rng.randint(1, 100_000),
+            start_date=to_date((start_month_ordinal, start_day)),
+            cliff_months=min(rng.choice((0, 1, 6, 12)), case.duration_months),
+            duration_months=case.duration_months,
+        ))
+
+    # The first valuation is known before any grant starts, the rest are spread up to the end
+    first_day = to_date((_FIRST_START_MONTH_ORDINAL - 1, 1)).toordinal()
+    last_day = to_date(
+        (_FIRST_START_MONTH_ORDINAL + _START_MONTHS + case.duration_months, 1)
+    ).toordinal()
+    valuation_days = [first_day] + [
+        rng.randint(first_day, last_day) for _ in range(case.valuations - 1)
+    ]
+    company_valuations = [
+        CompanyValuationTerms(
+            price=Decimal(rng.randint(100, 100_000)) / 100,
+            valuation_date=date.fromordinal(valuation_day),
+        )
+        for valuation_day in valuation_days
+    ]
+
+    return option_grants, company_valuations
+
+
+def clear_caches() -> None:
+    caches: tuple[LRUCache, ...] = (
+        result_cache, vesting_template_cache, parsed_date_cache, formatted_date_cache,
+    )
+
+    for cache in caches:
+        cache.clear()
+
+
+def time_stage(
+    stage: Callable[[], Any], repeat: int, setup: Callable[[], Any] = clear_caches,
+) -> dict[str, float]:
+    """Time `stage` calls `repeat` times, `setup` is called before every call untimed."""
+    timings = []
+
+    for _ in range(repeat):
+        setup()
+        started_at = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - started_at)
+
+    return {'min': min(timings), 'median': statistics.median(timings)}
+
+
+def run_case(case: BenchmarkCase, client: TestClient, repeat: int, seed: int = 0) -> StageTimings:
+    option_grants, company_valuations = generate_case_data(case, seed)
+
+    # Inputs of every stage are prepared by the previous stages upfront
+    vesting_schedule = VESTING_ENGINES['python'](option_grants)
+    vesting_timeline = form_dense_monthly_vesting_timeline(
+        vesting_schedule,
+        to_month_day(min(grant.start_date for grant in option_grants)),
+        max(vesting_schedule),
+    )
+    month_days = list(vesting_timeline.month_days())
+    valuation_index = ValuationIndex.from_company_valuations(company_valuations)
+    valuated_timeline = _valuate_vesting_timeline(
+        month_days, vesting_timeline.vested_quantities, valuation_index,
+    )
+    payload = _encode_request_payload(option_grants, company_valuations)
+
+    def post_request() -> None:
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value',
+            content=payload,
+            headers={'Content-Type': 'application/json'},
+        )
+        response.raise_for_status()
+
+    return {
+        'parse': time_stage(lambda: EquityValuationRequest.parse_raw(payload), repeat),
+        'vesting_schedule': time_stage(
+            lambda: VESTING_ENGINES['python'](option_grants), repeat,
+        ),
+        'vesting_schedule_cached': time_stage(
+            lambda: VESTING_ENGINES['python'](option_grants), repeat, setup=lambda: None,
+        ),
+        'vesting_schedule_numpy': time_stage(
+            lambda: VESTING_ENGINES['numpy'](option_grants), repeat,
+        ),
+        'monthly_timeline': time_stage(
+            lambda: form_dense_monthly_vesting_timeline(
+                vesting_schedule, vesting_timeline.start_date, vesting_timeline.end_date,
+            ),
+            repeat,
+        ),
+        'valuation': time_stage(
+            lambda: _valuate_vesting_timeline(
+                month_days, vesting_timeline.vested_quantities, valuation_index,
+            ),
+            repeat,
+        ),
+        'encoding': time_stage(lambda: encode_valuated_timeline(valuated_timeline), repeat),
+        'http': time_stage(post_request, repeat),
+    }
+
+
+def run_benchmarks(
+    grid: dict[str, tuple], repeat: int, seed: int = 0, log: Optional[Callable[[str], Any]] = None,
+) -> dict:
+    client = TestClient(create_app())
+    results = {}
+
+    for case in iter_benchmark_cases(grid):
+        if log is not None:
+            log(f'{case.name}...')
+
+        results[case.name] = {
+            'case': case._asdict(),
+            'stages': run_case(case, client, repeat, seed),
+        }
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """
+        Get descriptions of stages whose best time is slower than in the baseline
+        by more than `tolerance` share. Cases missing in either results are skipped.
+    """
+    slowdowns = []
+
+    for case_name, case_results in current['results'].items():
+        baseline_stages = baseline['results'].get(case_name, {}).get('stages', {})
+
+        for stage, timings in case_results['stages'].items():
+            if stage not in baseline_stages:
+                continue
+
+            baseline_seconds = baseline_stages[stage]['min']
+            current_seconds = timings['min']
+
+            if (
+                current_seconds > baseline_seconds * (1 + tolerance)
+                and current_seconds - baseline_seconds > _MIN_SLOWDOWN_SECONDS
+            ):
+                slowdowns.append(
+                    f'{case_name} {stage}: {baseline_seconds:.6f}s -> {current_seconds:.6f}s '
+                    f'(x{current_seconds / baseline_seconds:.2f})'
+                )
+
+    return slowdowns
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--output', help='JSON file for the results, stdout by default')
+    run_parser.add_argument('--baseline', help='JSON results to compare with')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--quick', action='store_true', help='run the smaller grid')
+    run_parser.add_argument('--tolerance', type=float, default=0.2)
+
+    compare_parser = subparsers.add_parser('compare', help='compare stored results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = run_benchmarks(
+            QUICK_GRID if args.quick else GRID, args.repeat, args.seed,
+            log=lambda message: print(message, file=sys.stderr),
+        )
+
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump(current, output_file, indent=2)
+        else:
+            json.dump(current, sys.stdout, indent=2)
+
+        if not args.baseline:
+            return 0
+
+        baseline_path = args.baseline
+    else:
+        with open(args.current) as current_file:
+            current = json.load(current_file)
+
+        baseline_path = args.baseline
+
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    slowdowns = compare_results(baseline, current, args.tolerance)
+
+    for slowdown in slowdowns:
+        print(f'SLOWER {slowdown}', file=sys.stderr)
+
+    return 1 if slowdowns else 0
+
+
+def _encode_request_payload(
+    option_grants: list[OptionGrantTerms], company_valuations: list[CompanyValuationTerms],
+) -> bytes:
+    return json.dumps({
+        'option_grants': [
+            {
+                'quantity': grant.quantity,
+                'start_date': grant.start_date.strftime(settings.DATE_FORMAT),
+                'cliff_months': grant.cliff_months,
+                'duration_months': grant.duration_months,
+            }
+            for grant in option_grants
+        ],
+        'company_valuations': [
+            {
+                'price': float(cv.price),
+                'valuation_date': cv.valuation_date.strftime(settings.DATE_FORMAT),
+            }
+            for cv in company_valuations
+        ],
+    }).encode()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
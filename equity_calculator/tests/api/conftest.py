@@ -3,10 +3,19 @@ from typing import Generator
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app.core.config import settings
+from app.main import app, create_app
 
 
 @pytest.fixture(scope='module')
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as test_client:
         yield test_client
+
+
+@pytest.fixture
+def profiling_client(monkeypatch) -> Generator[TestClient, None, None]:
+    monkeypatch.setattr(settings, 'PROFILING_ENABLED', True)
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
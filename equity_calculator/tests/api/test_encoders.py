@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from app.api.encoders import (NDJSON_CHUNK_POINTS, encode_scenario_valuations,
+                              encode_valuated_runs, encode_valuated_timeline,
+                              encode_valuated_timelines, iter_ndjson_valuated_timeline)
+from app.schemas import (VestedEquityPercentile, VestedEquityScenarios, VestedEquityValuation,
+                         VestedEquityValuationRun)
+from app.services.scenario_valuation import ScenarioValuationMatrix
+from app.services.vesting_calculator import ValuatedRuns, ValuatedTimeline
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+VALUATED_TIMELINE = ValuatedTimeline(
+    [date(2018, 1, 1), date(2018, 2, 1), date(2018, 3, 1), date(2018, 3, 15), date(2018, 4, 1)],
+    [
+        Decimal(0),
+        Decimal('0.357582') * 3,
+        Decimal('12345678901234567890.5'),
+        Decimal('0.1') * 7,
+        Decimal('1E+16'),
+    ],
+)
+
+
+def _render_json_response(content: object) -> bytes:
+    return JSONResponse(jsonable_encoder(content, by_alias=True)).body
+
+
+def test_encode_valuated_timeline_same_as_json_response() -> None:
+    assert encode_valuated_timeline(VALUATED_TIMELINE) == _render_json_response(
+        VALUATED_TIMELINE.to_vested_equity_valuations()
+    )
+
+
+def test_encode_valuated_timeline_empty() -> None:
+    assert encode_valuated_timeline(ValuatedTimeline([], [])) == b'[]'
+
+
+def test_encode_valuated_runs_same_as_json_response() -> None:
+    valuated_runs = ValuatedRuns(
+        VALUATED_TIMELINE.dates, VALUATED_TIMELINE.dates[1:] + [date(2019, 1, 1)],
+        VALUATED_TIMELINE.total_values,
+    )
+
+    assert encode_valuated_runs(valuated_runs) == _render_json_response([
+        VestedEquityValuationRun(
+            total_value=total_value, start_date=start_date, end_date=end_date,
+        )
+        for start_date, end_date, total_value in zip(*valuated_runs)
+    ])
+
+
+def test_encode_scenario_valuations_same_as_json_response() -> None:
+    total_values = np.array([[0.0, 0.1 * 3, 1e16], [0.0, 2.5, 12345678901234.5]])
+    percentile_values = np.array([[0.0, 1.4, 6172839450617.25]])
+
+    for scenarios_total_values in (total_values, None):
+        scenario_valuations = ScenarioValuationMatrix(
+            VALUATED_TIMELINE.dates[:3], scenarios_total_values, percentile_values,
+        )
+
+        assert encode_scenario_valuations(
+            scenario_valuations, [50],
+        ) == _render_json_response(VestedEquityScenarios(
+            dates=scenario_valuations.dates,
+            scenarios=None if scenarios_total_values is None else scenarios_total_values.tolist(),
+            percentiles=[
+                VestedEquityPercentile(percentile=50, total_values=percentile_values[0].tolist()),
+            ],
+        ))
+
+
+def test_encode_valuated_timelines_same_as_json_response() -> None:
+    valuated_timelines = {'alice': VALUATED_TIMELINE, 'bob "Ω"': VALUATED_TIMELINE}
+    vested_equity_valuations: dict[str, list[VestedEquityValuation]] = {
+        holder_id: valuated_timeline.to_vested_equity_valuations()
+        for holder_id, valuated_timeline in valuated_timelines.items()
+    }
+
+    assert encode_valuated_timelines(valuated_timelines) == _render_json_response(
+        vested_equity_valuations
+    )
+
+
+def test_iter_ndjson_valuated_timeline_lines_are_json_array_items() -> None:
+    valuated_points = [
+        (date(2018, 1, 1), Decimal(point_idx) / 10)
+        for point_idx in range(NDJSON_CHUNK_POINTS * 2 + 1)
+    ]
+
+    chunks = list(iter_ndjson_valuated_timeline(iter(valuated_points)))
+
+    assert len(chunks) == 3
+    assert b''.join(chunks).splitlines() == [
+        encode_valuated_timeline(ValuatedTimeline([date_], [total_value]))[1:-1]
+        for date_, total_value in valuated_points
+    ]
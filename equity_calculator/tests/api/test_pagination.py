@@ -0,0 +1,43 @@
+import base64
+import json
+
+import pytest
+from app.api.pagination import decode_cursor, encode_cursor
+from app.services.vesting_calculator import TimelineCursor
+from fastapi import HTTPException
+
+TIMELINE_DIGEST = 'timeline digest'
+
+
+def test_cursor_round_trip() -> None:
+    cursor = TimelineCursor(point_idx=120, vested_quantity=10 ** 20, valuation_idx=-1)
+
+    assert decode_cursor(encode_cursor(cursor, TIMELINE_DIGEST), TIMELINE_DIGEST) == cursor
+
+
+@pytest.mark.parametrize('token', ['', 'not a cursor', 'WzEsMl0=', 'WzEsMiwiMyJd'])
+def test_decode_invalid_cursor(token: str) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(token, TIMELINE_DIGEST)
+
+    assert exc_info.value.status_code == 422
+
+
+def test_decode_tampered_cursor() -> None:
+    token = encode_cursor(TimelineCursor(3, 1200, 0), TIMELINE_DIGEST)
+    *_, signature = json.loads(base64.urlsafe_b64decode(token))
+    tampered_token = base64.urlsafe_b64encode(json.dumps([3, 10 ** 30, 0, signature]).encode())
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(tampered_token.decode(), TIMELINE_DIGEST)
+
+    assert exc_info.value.status_code == 422
+
+
+def test_decode_cursor_of_another_timeline() -> None:
+    token = encode_cursor(TimelineCursor(3, 1200, 0), TIMELINE_DIGEST)
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(token, 'another timeline digest')
+
+    assert exc_info.value.status_code == 422
@@ -0,0 +1,75 @@
+import logging
+
+from app.core.config import settings
+from app.core.timing import record_stage_timings, timed_stage
+from app.main import create_app
+from app.services.cache import result_cache
+from fastapi.testclient import TestClient
+
+DATA = {
+    'option_grants': [
+        {
+            'quantity': 800,
+            'start_date': '01-01-2018',
+            'cliff_months': 4,
+            'duration_months': 8
+        }
+    ],
+    'company_valuations': [
+        {
+            'price': 10.0,
+            'valuation_date': '09-12-2017'
+        }
+    ]
+}
+
+
+def test_timed_stage() -> None:
+    # Nothing is recorded outside of the request
+    with timed_stage('vesting'):
+        pass
+
+    with record_stage_timings() as stage_timings:
+        with timed_stage('vesting'):
+            pass
+
+        with timed_stage('vesting'):
+            pass
+
+    assert list(stage_timings.stages) == ['vesting']
+    assert 0 < stage_timings.stages['vesting'] <= stage_timings.elapsed
+
+
+def test_server_timing(monkeypatch, caplog) -> None:
+    monkeypatch.setattr(settings, 'SERVER_TIMING_ENABLED', True)
+    client = TestClient(create_app())
+    # Computation stages are skipped for the cached results
+    result_cache.clear()
+
+    with caplog.at_level(logging.INFO, logger='app.api.server_timing'):
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value',
+            json=DATA,
+        )
+
+    assert response.status_code == 200
+
+    server_timing_stages = [
+        server_timing.split(';')[0]
+        for server_timing in response.headers['Server-Timing'].split(', ')
+    ]
+    assert set(server_timing_stages) >= {
+        'parse', 'vesting', 'bucketing', 'valuation', 'encoding', 'total',
+    }
+
+    [log_record] = caplog.records
+    assert log_record.status_code == 200
+    assert log_record.path == f'{settings.API_V1_STR}/timelines/vested_value'
+    assert set(log_record.stage_durations_ms) == set(server_timing_stages) - {'total'}
+
+
+def test_server_timing_disabled(client: TestClient) -> None:
+    response = client.post(f'{settings.API_V1_STR}/timelines/vested_value', json=DATA)
+
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
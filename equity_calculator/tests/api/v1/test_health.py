@@ -0,0 +1,86 @@
+from app.core.config import settings
+from fastapi.testclient import TestClient
+
+
+def test_caches(client: TestClient) -> None:
+    response = client.get(f'{settings.API_V1_STR}/health/caches')
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert set(response_data) == {
+        'results', 'vesting_templates', 'parsed_dates', 'formatted_dates',
+    }
+    assert set(response_data['vesting_templates']) == {
+        'hits', 'misses', 'size', 'max_size', 'hit_ratio',
+    }
+
+
+def test_metrics(client: TestClient) -> None:
+    route_labels = f'method="POST",route="{settings.API_V1_STR}/timelines/vested_value"'
+    request_duration_count = f'equity_calculator_request_duration_seconds_count{{{route_labels}}}'
+    requests_ok = f'equity_calculator_requests_total{{{route_labels},status_code="200"}}'
+    grants_size_count = 'equity_calculator_request_input_size_count{input="grants"}'
+
+    # Metrics are collected for the whole process, so other tests requests are counted too
+    metrics_before = _get_metrics(client)
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json={
+            'option_grants': [
+                {
+                    'quantity': 100,
+                    'start_date': '01-01-2018',
+                    'cliff_months': 0,
+                    'duration_months': 1
+                },
+            ],
+            'company_valuations': [
+                {
+                    'price': 10.0,
+                    'valuation_date': '01-12-2017'
+                },
+            ],
+        },
+    )
+    assert response.status_code == 200
+
+    metrics = _get_metrics(client)
+
+    for sample in (request_duration_count, requests_ok, grants_size_count):
+        assert metrics[sample] == metrics_before.get(sample, 0) + 1
+
+    assert metrics['equity_calculator_process_pool_queue_depth'] == 0
+    assert metrics['equity_calculator_threadpool_queue_depth'] == 0
+    assert 'equity_calculator_stage_duration_seconds_count{stage="vesting"}' in metrics
+    assert 'equity_calculator_cache_hit_ratio{cache="results"}' in metrics
+
+
+def test_metrics_route_path_template(profiling_client: TestClient) -> None:
+    route_labels = f'method="GET",route="{settings.API_V1_STR}/debug/profiles/{{profile_id}}"'
+    requests_not_found = f'equity_calculator_requests_total{{{route_labels},status_code="404"}}'
+
+    metrics_before = _get_metrics(profiling_client)
+
+    for profile_id in ('unknown-1', 'unknown-2'):
+        response = profiling_client.get(f'{settings.API_V1_STR}/debug/profiles/{profile_id}')
+        assert response.status_code == 404
+
+    metrics = _get_metrics(profiling_client)
+
+    assert metrics[requests_not_found] == metrics_before.get(requests_not_found, 0) + 2
+    assert not any('unknown-1' in sample for sample in metrics)
+
+
+def _get_metrics(client: TestClient) -> dict[str, float]:
+    response = client.get(f'{settings.API_V1_STR}/health/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+
+    return {
+        sample: float(value)
+        for sample, value in (
+            line.rsplit(' ', 1) for line in response.text.splitlines()
+            if not line.startswith('#')
+        )
+    }
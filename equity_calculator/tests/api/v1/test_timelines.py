@@ -1,6 +1,10 @@
 from decimal import Decimal
+from typing import Any
 
+from app.api.pagination import encode_cursor
+from app.api.v1 import timelines
 from app.core.config import settings
+from app.services.vesting_calculator import TimelineCursor, ValuatedTimeline
 from fastapi.testclient import TestClient
 
 
@@ -1191,3 +1195,1074 @@ def test_vested_value_periodic_decimal_monthly_vested_quantity(client: TestClien
             'date': '01-04-2018'
         },
     ]
+
+
+def test_vested_value_numpy_vesting_engine(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'VESTING_ENGINE', 'numpy')
+
+    data = {
+        'option_grants': [
+            {
+                'quantity': 6,
+                'start_date': '31-10-2021',
+                'cliff_months': 3,
+                'duration_months': 6
+            },
+        ],
+        'company_valuations': [
+            {
+                'price': 2.0,
+                'valuation_date': '01-10-2021'
+            },
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == [
+        {'total_value': 0.0, 'date': '31-10-2021'},
+        {'total_value': 0.0, 'date': '01-11-2021'},
+        {'total_value': 0.0, 'date': '01-12-2021'},
+        {'total_value': 0.0, 'date': '01-01-2022'},
+        {'total_value': 6.0, 'date': '01-02-2022'},
+        {'total_value': 8.0, 'date': '01-03-2022'},
+        {'total_value': 10.0, 'date': '01-04-2022'},
+        {'total_value': 12.0, 'date': '30-04-2022'},
+    ]
+
+
+def test_vested_value_window(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            }
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'from_date': '15-04-2018', 'to_date': '01-07-2018'},
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == [
+        {
+            'total_value': 4000.0,
+            'date': '01-05-2018'
+        },
+        {
+            'total_value': 5000.0,
+            'date': '01-06-2018'
+        },
+        {
+            'total_value': 6000.0,
+            'date': '01-07-2018'
+        },
+    ]
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'from_date': '01-08-2018'},
+        json=data,
+        headers={'Accept': 'application/x-ndjson'},
+    )
+    assert response.status_code == 200
+    assert response.text == (
+        '{"total_value":7000.0,"date":"01-08-2018"}\n'
+        '{"total_value":8000.0,"date":"01-09-2018"}\n'
+    )
+
+
+def test_vested_value_invalid_window(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            }
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'from_date': '01-07-2018', 'to_date': '01-05-2018'},
+        json=data,
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'from_date': '2018-07-01'},
+        json=data,
+    )
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['loc'] == ['query', 'from_date']
+
+
+def test_vested_value_granularity(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '15-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            }
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'granularity': 'quarterly'},
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == [
+        {
+            'total_value': 0.0,
+            'date': '15-01-2018'
+        },
+        {
+            'total_value': 0.0,
+            'date': '01-04-2018'
+        },
+        {
+            'total_value': 5000.0,
+            'date': '01-07-2018'
+        },
+        # Vests of the end quarter before the end date are on the next quarter start
+        {
+            'total_value': 6000.0,
+            'date': '15-09-2018'
+        },
+        {
+            'total_value': 8000.0,
+            'date': '01-10-2018'
+        },
+    ]
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'granularity': 'weekly', 'page_size': 10},
+        json=data,
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'granularity': 'hourly'},
+        json=data,
+    )
+    assert response.status_code == 422
+
+
+def test_vested_value_compact(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            },
+            {
+                'price': 5.0,
+                'valuation_date': '01-08-2018'
+            },
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'compact': 'true'},
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == [
+        {
+            'total_value': 0.0,
+            'start_date': '01-01-2018',
+            'end_date': '01-04-2018'
+        },
+        {
+            'total_value': 4000.0,
+            'start_date': '01-05-2018',
+            'end_date': '01-05-2018'
+        },
+        {
+            'total_value': 5000.0,
+            'start_date': '01-06-2018',
+            'end_date': '01-06-2018'
+        },
+        {
+            'total_value': 6000.0,
+            'start_date': '01-07-2018',
+            'end_date': '01-07-2018'
+        },
+        {
+            'total_value': 3500.0,
+            'start_date': '01-08-2018',
+            'end_date': '01-08-2018'
+        },
+        {
+            'total_value': 4000.0,
+            'start_date': '01-09-2018',
+            'end_date': '01-09-2018'
+        },
+    ]
+
+
+def test_vested_value_compact_response_schema(client: TestClient) -> None:
+    response = client.get(f'{settings.API_V1_STR}/openapi.json')
+    assert response.status_code == 200
+
+    paths = response.json()['paths']
+
+    for path in ('vested_value', 'vested_value/columnar'):
+        response_schema = paths[f'{settings.API_V1_STR}/timelines/{path}']['post']['responses'][
+            '200'
+        ]['content']['application/json']['schema']
+
+        assert [item_schema['items'] for item_schema in response_schema['anyOf']] == [
+            {'$ref': '#/components/schemas/VestedEquityValuation'},
+            {'$ref': '#/components/schemas/VestedEquityValuationRun'},
+        ]
+
+
+def test_vested_value_pages(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'TIMELINE_MAX_PAGE_SIZE', 4)
+
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            }
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+    )
+    assert response.status_code == 200
+    timeline = response.json()
+
+    pages = []
+    params = {'page_size': '10'}
+
+    while True:
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value',
+            params=params,
+            json=data,
+        )
+        assert response.status_code == 200
+        pages.append(response.json())
+
+        if 'X-Next-Cursor' not in response.headers:
+            break
+
+        params = {'cursor': response.headers['X-Next-Cursor']}
+
+    # Page size is limited by the settings
+    assert list(map(len, pages)) == [4, 4, 1]
+    assert sum(pages, []) == timeline
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'cursor': 'not a cursor'},
+        json=data,
+    )
+    assert response.status_code == 422
+
+    # Cursors are signed along with the payload and window of their timeline
+    cursor = encode_cursor(TimelineCursor(4, 10 ** 30, 0), 'forged timeline digest')
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'cursor': cursor},
+        json=data,
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'page_size': '4'},
+        json=data,
+    )
+    cursor = response.headers['X-Next-Cursor']
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'cursor': cursor, 'to_date': '01-01-2019'},
+        json=data,
+    )
+    assert response.status_code == 422
+
+    other_data = {
+        'option_grants': [
+            {
+                'quantity': 4800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': data['company_valuations'],
+    }
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        params={'cursor': cursor},
+        json=other_data,
+    )
+    assert response.status_code == 422
+
+
+def test_vested_value_asof(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            },
+            {
+                'price': 20.0,
+                'valuation_date': '15-07-2018'
+            },
+        ],
+        'query_dates': ['01-01-2019', '30-04-2018', '01-05-2018', '15-07-2018'],
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/asof',
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == [
+        {
+            'total_value': 16000.0,
+            'date': '01-01-2019'
+        },
+        {
+            'total_value': 0.0,
+            'date': '30-04-2018'
+        },
+        {
+            'total_value': 4000.0,
+            'date': '01-05-2018'
+        },
+        {
+            'total_value': 12000.0,
+            'date': '15-07-2018'
+        },
+    ]
+
+
+def test_vested_value_asof_unknown_stock_price(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            },
+        ],
+        'query_dates': ['08-12-2017'],
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/asof',
+        json=data,
+    )
+    assert response.status_code == 422
+
+
+def test_vested_value_scenarios(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'valuation_dates': ['15-07-2018', '09-12-2017'],
+        'price_paths': [[20.0, 10.0], [5.0, 10.0], [2.5, 1.0]],
+        'percentiles': [50],
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/scenarios',
+        json={**data, 'include_scenarios': True},
+        params={'from_date': '01-05-2018', 'to_date': '01-08-2018'},
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == {
+        'dates': ['01-05-2018', '01-06-2018', '01-07-2018', '01-08-2018'],
+        'scenarios': [
+            [4000.0, 5000.0, 6000.0, 14000.0],
+            [4000.0, 5000.0, 6000.0, 3500.0],
+            [400.0, 500.0, 600.0, 1750.0],
+        ],
+        'percentiles': [
+            {
+                'percentile': 50.0,
+                'total_values': [4000.0, 5000.0, 6000.0, 3500.0]
+            },
+        ],
+    }
+
+    # Only percentiles are returned by default
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/scenarios',
+        json=data,
+        params={'from_date': '01-05-2018', 'to_date': '01-08-2018'},
+    )
+    assert response.status_code == 200
+    assert response.json() == {**response_data, 'scenarios': None}
+
+
+def test_vested_value_scenarios_invalid_price_paths(client: TestClient) -> None:
+    data: dict[str, Any] = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 4,
+                'duration_months': 8
+            }
+        ],
+        'valuation_dates': ['15-07-2018', '09-12-2017'],
+        'price_paths': [[20.0, 10.0]],
+    }
+
+    for invalid_data in (
+        {**data, 'price_paths': []},
+        {**data, 'price_paths': [[20.0], [10.0]]},
+        {**data, 'price_paths': [[20.0, 10.0], [30.0]]},
+        {**data, 'price_paths': [[20.0, 'ten']]},
+        {**data, 'price_paths': [[20.0, 0]]},
+        {**data, 'price_paths': [[20.0, None]]},
+        {**data, 'percentiles': [101]},
+        {**data, 'valuation_dates': ['15-07-2018', '10-12-2018']},
+    ):
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value/scenarios',
+            json=invalid_data,
+        )
+        assert response.status_code == 422
+
+
+def test_vested_value_batch(client: TestClient) -> None:
+    data = {
+        'holder_option_grants': {
+            'alice': [
+                {
+                    'quantity': 400,
+                    'start_date': '01-01-2018',
+                    'cliff_months': 1,
+                    'duration_months': 2
+                },
+            ],
+            'bob': [
+                {
+                    'quantity': 100,
+                    'start_date': '15-01-2018',
+                    'cliff_months': 0,
+                    'duration_months': 1
+                },
+                {
+                    'quantity': 200,
+                    'start_date': '01-02-2018',
+                    'cliff_months': 0,
+                    'duration_months': 1
+                },
+            ],
+        },
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+            {
+                'price': 20.0,
+                'valuation_date': '01-03-2018'
+            },
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/batch',
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == {
+        'alice': [
+            {'total_value': 0.0, 'date': '01-01-2018'},
+            {'total_value': 2000.0, 'date': '01-02-2018'},
+            {'total_value': 8000.0, 'date': '01-03-2018'},
+        ],
+        'bob': [
+            {'total_value': 0.0, 'date': '15-01-2018'},
+            {'total_value': 0.0, 'date': '01-02-2018'},
+            {'total_value': 6000.0, 'date': '01-03-2018'},
+        ],
+    }
+
+
+def test_vested_value_batch_unknown_stock_price(client: TestClient) -> None:
+    data = {
+        'holder_option_grants': {
+            'alice': [
+                {
+                    'quantity': 800,
+                    'start_date': '01-01-2018',
+                    'cliff_months': 4,
+                    'duration_months': 8
+                }
+            ],
+        },
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '15-07-2018'
+            },
+        ],
+    }
+
+    for accept in ('application/json', 'application/x-ndjson'):
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value/batch',
+            json=data,
+            headers={'Accept': accept},
+        )
+        assert response.status_code == 422
+        assert response.json() == {'detail': 'Unknown stock price at the start of the timeline'}
+
+
+def test_vested_value_batch_holder_without_grants(client: TestClient) -> None:
+    data = {
+        'holder_option_grants': {
+            'alice': [
+                {
+                    'quantity': 400,
+                    'start_date': '01-01-2018',
+                    'cliff_months': 1,
+                    'duration_months': 2
+                },
+            ],
+            'bob': [],
+        },
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/batch',
+        json=data,
+    )
+    assert response.status_code == 422
+
+
+def test_vested_value_etag(client: TestClient) -> None:
+    option_grants = [
+        {
+            'quantity': 100,
+            'start_date': '01-01-2018',
+            'cliff_months': 0,
+            'duration_months': 1
+        },
+        {
+            'quantity': 200,
+            'start_date': '01-02-2018',
+            'cliff_months': 0,
+            'duration_months': 1
+        },
+    ]
+    company_valuations = [
+        {
+            'price': 10.0,
+            'valuation_date': '01-12-2017'
+        },
+    ]
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json={'option_grants': option_grants, 'company_valuations': company_valuations},
+    )
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    # Grants order doesn't change the result
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json={'option_grants': option_grants[::-1], 'company_valuations': company_valuations},
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.content == b''
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json={'option_grants': option_grants[:1], 'company_valuations': company_valuations},
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_vested_value_etag_same_date_valuations_order(client: TestClient) -> None:
+    option_grants = [
+        {
+            'quantity': 100,
+            'start_date': '01-01-2018',
+            'cliff_months': 0,
+            'duration_months': 1
+        },
+    ]
+    company_valuations = [
+        {
+            'price': 10.0,
+            'valuation_date': '01-01-2018'
+        },
+        {
+            'price': 20.0,
+            'valuation_date': '01-01-2018'
+        },
+    ]
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json={'option_grants': option_grants, 'company_valuations': company_valuations},
+    )
+    assert response.status_code == 200
+    assert response.json()[-1]['total_value'] == 2000.0
+    etag = response.headers['ETag']
+
+    # The last valuation of the same date sets the price, so the order matters
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json={'option_grants': option_grants, 'company_valuations': company_valuations[::-1]},
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json()[-1]['total_value'] == 1000.0
+
+
+def test_vested_value_result_cache(client: TestClient, monkeypatch) -> None:
+    calls = []
+
+    def run_valuated_timeline(*args):
+        calls.append(args)
+        return ValuatedTimeline([], [])
+
+    monkeypatch.setattr(timelines, 'run_valuated_timeline', run_valuated_timeline)
+
+    data = {
+        'option_grants': [
+            {
+                'quantity': 123,
+                'start_date': '01-01-2018',
+                'cliff_months': 0,
+                'duration_months': 1
+            },
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+        ]
+    }
+
+    for _ in range(2):
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value',
+            json=data,
+        )
+        assert response.status_code == 200
+
+    assert len(calls) == 1
+
+
+def test_vested_value_ndjson(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 800,
+                'start_date': '01-01-2018',
+                'cliff_months': 1,
+                'duration_months': 2
+            }
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '09-12-2017'
+            }
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+        headers={'Accept': 'application/x-ndjson'},
+    )
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    assert response.text == (
+        '{"total_value":0.0,"date":"01-01-2018"}\n'
+        '{"total_value":4000.0,"date":"01-02-2018"}\n'
+        '{"total_value":8000.0,"date":"01-03-2018"}\n'
+    )
+
+
+def test_vested_value_batch_ndjson(client: TestClient) -> None:
+    data = {
+        'holder_option_grants': {
+            'alice': [
+                {
+                    'quantity': 400,
+                    'start_date': '01-01-2018',
+                    'cliff_months': 0,
+                    'duration_months': 1
+                },
+            ],
+            'bob': [
+                {
+                    'quantity': 100,
+                    'start_date': '01-02-2018',
+                    'cliff_months': 0,
+                    'duration_months': 1
+                },
+            ],
+        },
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/batch',
+        json=data,
+        headers={'Accept': 'application/x-ndjson'},
+    )
+    assert response.status_code == 200
+    assert response.text == (
+        '{"holder_id":"alice","total_value":0.0,"date":"01-01-2018"}\n'
+        '{"holder_id":"alice","total_value":4000.0,"date":"01-02-2018"}\n'
+        '{"holder_id":"bob","total_value":0.0,"date":"01-02-2018"}\n'
+        '{"holder_id":"bob","total_value":1000.0,"date":"01-03-2018"}\n'
+    )
+
+
+def test_vested_value_columnar(client: TestClient) -> None:
+    data = {
+        'option_grants': {
+            'quantities': [100, 200],
+            'start_dates': ['15-01-2018', '01-02-2018'],
+            'cliff_months': [0, 0],
+            'duration_months': [1, 1],
+        },
+        'company_valuations': {
+            'prices': [10.0, 20.0],
+            'valuation_dates': ['01-12-2017', '01-03-2018'],
+        },
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/columnar',
+        json=data,
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data == [
+        {'total_value': 0.0, 'date': '15-01-2018'},
+        {'total_value': 0.0, 'date': '01-02-2018'},
+        {'total_value': 6000.0, 'date': '01-03-2018'},
+    ]
+
+
+def test_vested_value_columnar_invalid_columns(client: TestClient) -> None:
+    option_grants: dict[str, Any] = {
+        'quantities': [100, 200],
+        'start_dates': ['15-01-2018', '01-02-2018'],
+        'cliff_months': [0, 0],
+        'duration_months': [1, 1],
+    }
+    company_valuations = {
+        'prices': [10.0],
+        'valuation_dates': ['01-12-2017'],
+    }
+
+    for invalid_option_grants in (
+        {**option_grants, 'quantities': [100]},
+        {**option_grants, 'quantities': [100, 0]},
+        {**option_grants, 'quantities': [100, 1.5]},
+        {**option_grants, 'start_dates': ['15-01-2018', '2018-02-01']},
+        {**option_grants, 'cliff_months': [0, 2]},
+        {**option_grants, 'duration_months': []},
+    ):
+        response = client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value/columnar',
+            json={
+                'option_grants': invalid_option_grants,
+                'company_valuations': company_valuations,
+            },
+        )
+        assert response.status_code == 422
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/columnar',
+        json={
+            'option_grants': option_grants,
+            'company_valuations': {**company_valuations, 'prices': [-10.0]},
+        },
+    )
+    assert response.status_code == 422
+
+
+def test_vested_value_columnar_etag(client: TestClient) -> None:
+    data = {
+        'option_grants': {
+            'quantities': [100, 200],
+            'start_dates': ['15-01-2018', '01-02-2018'],
+            'cliff_months': [0, 0],
+            'duration_months': [1, 1],
+        },
+        'company_valuations': {
+            'prices': [10.0],
+            'valuation_dates': ['01-12-2017'],
+        },
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/columnar',
+        json=data,
+    )
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    # Items of parallel arrays are matched by position, so their order matters
+    data['option_grants']['quantities'] = [200, 100]
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value/columnar',
+        json=data,
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_vested_value_profiling_disabled(client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 100,
+                'start_date': '01-01-2018',
+                'cliff_months': 0,
+                'duration_months': 1
+            },
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+        ]
+    }
+
+    response = client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+        headers={'X-Profile': '1'},
+    )
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+
+    response = client.get(f'{settings.API_V1_STR}/debug/profiles/unknown')
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'Not Found'}
+
+
+def test_vested_value_profiling(profiling_client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 100,
+                'start_date': '01-01-2018',
+                'cliff_months': 0,
+                'duration_months': 1
+            },
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+        ]
+    }
+
+    response = profiling_client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+        params={'profile': 'true'},
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {'total_value': 0.0, 'date': '01-01-2018'},
+        {'total_value': 1000.0, 'date': '01-02-2018'},
+    ]
+
+    response = profiling_client.get(
+        f'{settings.API_V1_STR}/debug/profiles/{response.headers["X-Profile-Id"]}'
+    )
+    assert response.status_code == 200
+
+    profile_report = response.json()
+    assert any(
+        'get_valuated_timeline' in function['function'] for function in profile_report['functions']
+    )
+    assert any(
+        '_parse_valuation_request' in function['function']
+        for function in profile_report['functions']
+    )
+    assert profile_report['peak_memory_bytes'] > 0
+    assert all(allocation['size_bytes'] > 0 for allocation in profile_report['allocations'])
+
+    response = profiling_client.get(f'{settings.API_V1_STR}/debug/profiles/unknown')
+    assert response.status_code == 404
+
+
+def test_vested_value_profiling_formats(profiling_client: TestClient) -> None:
+    data = {
+        'option_grants': [
+            {
+                'quantity': 100,
+                'start_date': '01-01-2018',
+                'cliff_months': 0,
+                'duration_months': 1
+            },
+        ],
+        'company_valuations': [
+            {
+                'price': 10.0,
+                'valuation_date': '01-12-2017'
+            },
+        ]
+    }
+
+    response = profiling_client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+        params={'compact': 'true'},
+    )
+    assert response.status_code == 200
+    compact_etag = response.headers['ETag']
+    compact_content = response.content
+
+    response = profiling_client.post(
+        f'{settings.API_V1_STR}/timelines/vested_value',
+        json=data,
+        params={'compact': 'true'},
+        headers={'X-Profile': '1'},
+    )
+    assert response.status_code == 200
+    assert 'X-Profile-Id' in response.headers
+    assert response.headers['ETag'] == compact_etag
+    assert response.content == compact_content
+
+    unsupported_requests: list[tuple[dict[str, str], dict[str, str]]] = [
+        ({'page_size': '1'}, {}),
+        ({}, {'Accept': 'application/x-ndjson'}),
+    ]
+
+    for params, headers in unsupported_requests:
+        response = profiling_client.post(
+            f'{settings.API_V1_STR}/timelines/vested_value',
+            json=data,
+            params=params,
+            headers={**headers, 'X-Profile': '1'},
+        )
+        assert response.status_code == 422
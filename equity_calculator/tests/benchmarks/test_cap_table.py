@@ -0,0 +1,65 @@
+import io
+import json
+
+from app.api.v1.timelines import ColumnarEquityValuationRequest, EquityValuationRequest
+from benchmarks.cap_table import (CapTableShape, iter_company_valuations, iter_option_grants,
+                                  write_cap_table)
+
+SHAPE = CapTableShape(employees=300, valuations=50)
+
+
+def test_cap_table_is_deterministic() -> None:
+    assert list(iter_option_grants(SHAPE, seed=1)) == list(iter_option_grants(SHAPE, seed=1))
+    assert list(iter_option_grants(SHAPE, seed=1)) != list(iter_option_grants(SHAPE, seed=2))
+    assert (
+        list(iter_company_valuations(SHAPE, seed=1))
+        == list(iter_company_valuations(SHAPE, seed=1))
+    )
+
+
+def test_cap_table_shape() -> None:
+    option_grants = list(iter_option_grants(SHAPE))
+    company_valuations = list(iter_company_valuations(SHAPE))
+
+    # Refresh grants come on top of the initial grant of every employee
+    assert len(option_grants) > SHAPE.employees
+    assert {grant.cliff_months for grant in option_grants} == {0, 3, 6, 12}
+    assert any(grant.start_date.day >= 29 for grant in option_grants)
+    assert all(grant.start_date < SHAPE.end_date for grant in option_grants)
+
+    assert len(company_valuations) == SHAPE.valuations
+    assert [cv.valuation_date for cv in company_valuations] == sorted(
+        cv.valuation_date for cv in company_valuations
+    )
+    assert company_valuations[0].valuation_date < min(grant.start_date for grant in option_grants)
+    assert all(cv.price > 0 for cv in company_valuations)
+
+
+def test_write_cap_table() -> None:
+    option_grants = list(iter_option_grants(SHAPE))
+    company_valuations = list(iter_company_valuations(SHAPE))
+
+    output_file = io.StringIO()
+    write_cap_table(output_file, SHAPE, output_format='json')
+    request = EquityValuationRequest.parse_raw(output_file.getvalue())
+
+    assert [grant.start_date for grant in request.option_grants] == [
+        grant.start_date for grant in option_grants
+    ]
+    assert [cv.price for cv in request.company_valuations] == [
+        cv.price for cv in company_valuations
+    ]
+
+    output_file = io.StringIO()
+    write_cap_table(output_file, SHAPE, output_format='columnar')
+    columnar_request = ColumnarEquityValuationRequest.parse_raw(output_file.getvalue())
+
+    assert columnar_request.option_grants.to_option_grants() == option_grants
+    assert columnar_request.company_valuations.to_company_valuations() == company_valuations
+
+    output_file = io.StringIO()
+    write_cap_table(output_file, SHAPE, output_format='ndjson')
+    lines = [json.loads(line) for line in output_file.getvalue().splitlines()]
+
+    assert len(lines) == len(option_grants) + len(company_valuations)
+    assert sum('option_grant' in line for line in lines) == len(option_grants)
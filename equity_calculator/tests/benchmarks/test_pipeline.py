@@ -0,0 +1,58 @@
+from app.main import app
+from benchmarks.pipeline import (BenchmarkCase, compare_results, generate_case_data,
+                                 iter_benchmark_cases, run_case)
+from fastapi.testclient import TestClient
+
+
+def test_iter_benchmark_cases_varies_one_parameter_at_a_time() -> None:
+    cases = list(iter_benchmark_cases({'grants': (1, 1000), 'valuations': (1, 100)}))
+
+    assert cases == [
+        BenchmarkCase(grants=1, duration_months=48, valuations=100, start_days='any'),
+        BenchmarkCase(grants=1000, duration_months=48, valuations=100, start_days='any'),
+        BenchmarkCase(grants=1000, duration_months=48, valuations=1, start_days='any'),
+    ]
+
+
+def test_generate_case_data_is_deterministic() -> None:
+    case = BenchmarkCase(grants=10, duration_months=12, valuations=5, start_days='month_end')
+    option_grants, company_valuations = generate_case_data(case, seed=1)
+
+    assert (option_grants, company_valuations) == generate_case_data(case, seed=1)
+    assert len(option_grants) == 10
+    assert len(company_valuations) == 5
+    assert all(grant.start_date.day >= 28 for grant in option_grants)
+    assert min(cv.valuation_date for cv in company_valuations) < min(
+        grant.start_date for grant in option_grants
+    )
+
+
+def test_run_case() -> None:
+    case = BenchmarkCase(grants=3, duration_months=12, valuations=2, start_days='any')
+    stage_timings = run_case(case, TestClient(app), repeat=1)
+
+    assert {
+        'parse', 'vesting_schedule', 'monthly_timeline', 'valuation', 'encoding', 'http',
+    } <= set(stage_timings)
+    assert all(timings['min'] <= timings['median'] for timings in stage_timings.values())
+
+
+def test_compare_results_flags_slowdowns() -> None:
+    baseline = {'results': {'case': {'stages': {
+        'http': {'min': 0.010, 'median': 0.011},
+        'encoding': {'min': 0.0001, 'median': 0.0001},
+    }}}}
+    current = {'results': {
+        'case': {'stages': {
+            'http': {'min': 0.015, 'median': 0.016},
+            # Relative slowdown of a tiny stage is noise
+            'encoding': {'min': 0.0003, 'median': 0.0003},
+        }},
+        'new_case': {'stages': {'http': {'min': 1.0, 'median': 1.0}}},
+    }}
+
+    slowdowns = compare_results(baseline, current, tolerance=0.2)
+
+    assert len(slowdowns) == 1
+    assert slowdowns[0].startswith('case http')
+    assert compare_results(baseline, current, tolerance=0.6) == []
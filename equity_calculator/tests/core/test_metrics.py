@@ -0,0 +1,63 @@
+import pytest
+from app.core.metrics import Counter, Gauge, Histogram, Metric, MetricsRegistry
+
+
+def test_counter_and_gauge() -> None:
+    registry = MetricsRegistry()
+    counter = registry.register(Counter('requests_total', 'Requests.', ('route',)))
+    gauge = registry.register(Gauge('in_flight', 'Requests\nin flight.'))
+
+    counter.inc(route='/a')
+    counter.inc(2, route='/a')
+    counter.inc(route='/"b"')
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert registry.render() == (
+        '# HELP requests_total Requests.\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{route="/a"} 3\n'
+        'requests_total{route="/\\"b\\""} 1\n'
+        '# HELP in_flight Requests\\nin flight.\n'
+        '# TYPE in_flight gauge\n'
+        'in_flight 1\n'
+    )
+
+
+def test_histogram() -> None:
+    histogram = Histogram('duration_seconds', 'Duration.', ('stage',), buckets=(0.1, 1))
+
+    histogram.observe(0.1, stage='parse')
+    histogram.observe(0.5, stage='parse')
+    histogram.observe(2, stage='parse')
+
+    assert histogram.render() == '\n'.join([
+        '# HELP duration_seconds Duration.',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{stage="parse",le="0.1"} 1',
+        'duration_seconds_bucket{stage="parse",le="1"} 2',
+        'duration_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'duration_seconds_sum{stage="parse"} 2.6',
+        'duration_seconds_count{stage="parse"} 3',
+    ])
+
+
+def test_metric_labels_must_match() -> None:
+    counter = Counter('requests_total', 'Requests.', ('route',))
+
+    with pytest.raises(ValueError):
+        counter.inc(path='/a')
+
+
+def test_metric_registered_once() -> None:
+    registry = MetricsRegistry()
+    registry.register(Counter('requests_total', 'Requests.'))
+
+    with pytest.raises(ValueError):
+        registry.register(Counter('requests_total', 'Requests.'))
+
+
+def test_metric_must_have_samples() -> None:
+    with pytest.raises(TypeError):
+        Metric('metric', 'Metric without samples')  # type: ignore[abstract]
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+import pytest
+from app.core.config import settings
+from app.schemas import FormattedDate, format_date
+from app.services.cache import formatted_date_cache, parsed_date_cache
+from pydantic import errors
+
+
+@pytest.mark.parametrize(
+    'value', ['01-02-2020', '29-02-2020', '31-12-1999', '1-2-2020', '01-2-2020'],
+)
+def test_formatted_date_parsed_as_with_strptime(value: str) -> None:
+    assert FormattedDate.validate(value) == datetime.strptime(value, settings.DATE_FORMAT).date()
+
+
+@pytest.mark.parametrize(
+    'value', ['31-02-2020', '00-01-2020', '01-13-2020', '2020-02-01', '01-02-20201', '٠١-٠٢-٢٠٢٠'],
+)
+def test_formatted_date_invalid(value: str) -> None:
+    with pytest.raises(errors.DateError):
+        FormattedDate.validate(value)
+
+
+def test_formatted_date_other_format(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'DATE_FORMAT', '%Y/%m/%d')
+    parsed_date_cache.clear()
+
+    assert FormattedDate.validate('2020/02/01') == date(2020, 2, 1)
+
+    parsed_date_cache.clear()
+
+
+def test_formatted_date_cached() -> None:
+    parsed_date_cache.clear()
+
+    assert FormattedDate.validate('15-03-2021') == date(2021, 3, 15)
+    assert FormattedDate.validate('15-03-2021') == date(2021, 3, 15)
+    assert parsed_date_cache.stats.hits == 1
+
+
+def test_format_date_cached() -> None:
+    formatted_date_cache.clear()
+
+    assert format_date(date(2021, 3, 5)) == '05-03-2021'
+    assert format_date(date(2021, 3, 5)) == '05-03-2021'
+    assert formatted_date_cache.stats.hits == 1
@@ -0,0 +1,63 @@
+from app.services.cache import CacheStats, LRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.get('a') == 1
+
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats == CacheStats(hits=3, misses=1, size=2, max_size=2)
+    assert cache.stats.hit_ratio == 0.75
+
+
+def test_lru_cache_evicts_expired() -> None:
+    clock = FakeClock()
+    cache: LRUCache[str, int] = LRUCache(max_size=2, ttl_seconds=10, clock=clock)
+    cache.set('a', 1)
+
+    clock.now = 10
+    assert cache.get('a') == 1
+
+    clock.now = 10.5
+    assert cache.get('a') is None
+    assert cache.stats.size == 0
+
+
+def test_lru_cache_evicts_by_size_of_items() -> None:
+    cache: LRUCache[str, bytes] = LRUCache(max_size=10, get_size=len)
+    cache.set('a', b'1234')
+    cache.set('b', b'12345')
+    cache.set('a', b'123')
+    cache.set('too large', b'12345678901')
+
+    assert cache.stats.size == 8
+    assert cache.get('too large') is None
+
+    cache.set('c', b'1234')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'123'
+    assert cache.stats.size == 7
+
+
+def test_lru_cache_zero_size_stores_nothing() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=0)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
+    assert cache.stats == CacheStats(hits=0, misses=1, size=0, max_size=0)
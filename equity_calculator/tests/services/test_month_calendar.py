@@ -0,0 +1,35 @@
+from datetime import date
+
+import pytest
+from app.services.month_calendar import days_in_month, shift_months, to_date, to_month_day
+
+
+@pytest.mark.parametrize(
+    'date_, expected_days',
+    [
+        (date(2022, 1, 1), 31),
+        (date(2022, 2, 1), 28),
+        (date(2024, 2, 1), 29),
+        (date(1900, 2, 1), 28),
+        (date(2000, 2, 1), 29),
+        (date(2022, 4, 1), 30),
+        (date(2022, 12, 1), 31),
+    ],
+)
+def test_days_in_month(date_: date, expected_days: int) -> None:
+    month_ordinal, _ = to_month_day(date_)
+
+    assert days_in_month(month_ordinal) == expected_days
+
+
+def test_shift_months_clamps_day_to_month_end() -> None:
+    month_ordinal, day = to_month_day(date(2023, 10, 31))
+
+    assert to_date(shift_months(month_ordinal, 4, day)) == date(2024, 2, 29)
+    assert to_date(shift_months(month_ordinal, 5, day)) == date(2024, 3, 31)
+    assert to_date(shift_months(month_ordinal, 6, day)) == date(2024, 4, 30)
+
+
+def test_to_month_day_round_trip() -> None:
+    for date_ in (date(1, 1, 1), date(2022, 12, 31), date(9999, 12, 31)):
+        assert to_date(to_month_day(date_)) == date_
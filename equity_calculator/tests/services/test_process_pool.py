@@ -0,0 +1,58 @@
+from datetime import date
+from typing import Generator
+
+import pytest
+from app.core.config import settings
+from app.schemas import CompanyValuation, OptionGrant
+from app.services.process_pool import (estimate_computation_cost, get_process_pool,
+                                       run_valuated_timeline, run_valuated_timelines,
+                                       shutdown_process_pool)
+from app.services.vesting_calculator import (TimelineWindow, get_valuated_timeline,
+                                             get_valuated_timelines)
+
+OPTION_GRANTS = [
+    OptionGrant(quantity=10, start_date='14-01-2022', cliff_months=0, duration_months=4),
+    OptionGrant(quantity=6, start_date='31-01-2022', cliff_months=2, duration_months=6),
+]
+COMPANY_VALUATIONS = [
+    CompanyValuation(price=1.5, valuation_date='01-01-2022'),
+    CompanyValuation(price=2.25, valuation_date='01-04-2022'),
+]
+
+
+@pytest.fixture
+def process_pool(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
+    monkeypatch.setattr(settings, 'PROCESS_POOL_SIZE', 1)
+    monkeypatch.setattr(settings, 'PROCESS_POOL_COST_THRESHOLD', 0)
+    yield
+    shutdown_process_pool()
+
+
+def test_estimate_computation_cost() -> None:
+    assert estimate_computation_cost(OPTION_GRANTS) == 12
+
+
+def test_process_pool_is_disabled_by_default() -> None:
+    assert get_process_pool() is None
+
+
+def test_run_valuated_timeline_in_process_pool(process_pool: None) -> None:
+    assert run_valuated_timeline(OPTION_GRANTS, COMPANY_VALUATIONS) == (
+        get_valuated_timeline(OPTION_GRANTS, COMPANY_VALUATIONS)
+    )
+
+
+def test_run_valuated_timeline_in_process_pool_within_window(process_pool: None) -> None:
+    window = TimelineWindow(date(2022, 3, 1), date(2022, 6, 1))
+
+    assert run_valuated_timeline(OPTION_GRANTS, COMPANY_VALUATIONS, window) == (
+        get_valuated_timeline(OPTION_GRANTS, COMPANY_VALUATIONS, window)
+    )
+
+
+def test_run_valuated_timelines_in_process_pool(process_pool: None) -> None:
+    holder_option_grants = {'alice': OPTION_GRANTS, 'bob': OPTION_GRANTS[:1]}
+
+    assert run_valuated_timelines(holder_option_grants, COMPANY_VALUATIONS) == (
+        get_valuated_timelines(holder_option_grants, COMPANY_VALUATIONS)
+    )
@@ -0,0 +1,105 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.schemas import CompanyValuation, OptionGrant
+from app.services import scenario_valuation
+from app.services.scenario_valuation import get_scenario_valuations
+from app.services.vectorized_vesting_calculator import Granularity
+from app.services.vesting_calculator import TimelineWindow, get_valuated_timeline
+
+OPTION_GRANTS = [
+    OptionGrant(quantity=4800, start_date='15-01-2018', cliff_months=12, duration_months=48),
+    OptionGrant(quantity=700, start_date='31-03-2019', cliff_months=0, duration_months=7),
+]
+
+VALUATION_DATES = [date(2020, 6, 1), date(2017, 12, 1), date(2019, 4, 30), date(2019, 4, 30)]
+
+PRICE_PATHS = np.array([
+    [3.5, 1.0, 2.0, 2.5],
+    [0.25, 1.0, 10.0, 12.0],
+    [7.0, 0.5, 0.75, 1.25],
+])
+
+
+@pytest.mark.parametrize(
+    ('window', 'granularity'),
+    [
+        (None, 'monthly'),
+        (None, 'quarterly'),
+        (TimelineWindow(date(2019, 4, 15), date(2021, 1, 1)), 'monthly'),
+        (TimelineWindow(date(2019, 4, 15), None), 'weekly'),
+    ],
+)
+def test_get_scenario_valuations_same_as_valuated_timelines(
+    window: TimelineWindow | None, granularity: Granularity,
+) -> None:
+    scenario_valuations = get_scenario_valuations(
+        OPTION_GRANTS, VALUATION_DATES, PRICE_PATHS, (), window, granularity,
+    )
+
+    scenarios_total_values = scenario_valuations.total_values
+    assert scenarios_total_values is not None
+    assert scenarios_total_values.shape == (len(PRICE_PATHS), len(scenario_valuations.dates))
+
+    for prices, total_values in zip(PRICE_PATHS, scenarios_total_values):
+        valuated_timeline = get_valuated_timeline(
+            OPTION_GRANTS,
+            [
+                CompanyValuation(price=Decimal(str(price)), valuation_date=valuation_date)
+                for price, valuation_date in zip(prices, VALUATION_DATES)
+            ],
+            window,
+            granularity,
+        )
+
+        assert scenario_valuations.dates == valuated_timeline.dates
+        assert total_values.tolist() == pytest.approx(
+            list(map(float, valuated_timeline.total_values))
+        )
+
+
+def test_get_scenario_valuations_percentiles(monkeypatch) -> None:
+    scenario_valuations = get_scenario_valuations(
+        OPTION_GRANTS, VALUATION_DATES, PRICE_PATHS, [0, 50, 100],
+    )
+    total_values = scenario_valuations.total_values
+    assert total_values is not None
+
+    assert np.allclose(scenario_valuations.percentile_values, [
+        total_values.min(axis=0), np.median(total_values, axis=0), total_values.max(axis=0),
+    ])
+
+    # Without the values of every scenario, percentiles are computed by chunks of the points
+    monkeypatch.setattr(scenario_valuation, '_PERCENTILES_CHUNK_VALUES', len(PRICE_PATHS) * 7)
+    percentile_scenario_valuations = get_scenario_valuations(
+        OPTION_GRANTS, VALUATION_DATES, PRICE_PATHS, [0, 50, 100], include_scenarios=False,
+    )
+
+    assert percentile_scenario_valuations.total_values is None
+    assert np.allclose(
+        percentile_scenario_valuations.percentile_values, scenario_valuations.percentile_values,
+    )
+
+
+def test_get_scenario_valuations_max_values(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'SCENARIO_MAX_VALUES', len(PRICE_PATHS) * 12)
+
+    get_scenario_valuations(
+        OPTION_GRANTS, VALUATION_DATES, PRICE_PATHS, (), TimelineWindow(to_date=date(2018, 12, 31)),
+    )
+
+    with pytest.raises(ValueError, match='at most'):
+        get_scenario_valuations(OPTION_GRANTS, VALUATION_DATES, PRICE_PATHS)
+
+
+def test_get_scenario_valuations_unknown_stock_price() -> None:
+    with pytest.raises(ValueError, match='Unknown stock price'):
+        get_scenario_valuations(OPTION_GRANTS, [date(2018, 1, 16)], np.array([[1.0]]))
+
+
+def test_get_scenario_valuations_price_for_every_valuation_date() -> None:
+    with pytest.raises(ValueError, match='every valuation date'):
+        get_scenario_valuations(OPTION_GRANTS, VALUATION_DATES, PRICE_PATHS[:, 1:])
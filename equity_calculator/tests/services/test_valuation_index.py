@@ -0,0 +1,42 @@
+from datetime import date
+from decimal import Decimal
+
+from app.schemas import CompanyValuation
+from app.services.month_calendar import to_month_day
+from app.services.valuation_index import ValuationIndex, join_asof
+
+
+def test_valuation_index_sorted_by_date() -> None:
+    valuation_index = ValuationIndex.from_company_valuations([
+        CompanyValuation(price=3.0, valuation_date=date(2022, 3, 1)),
+        CompanyValuation(price=1.0, valuation_date=date(2022, 1, 1)),
+        CompanyValuation(price=2.0, valuation_date=date(2022, 2, 1)),
+    ])
+
+    assert valuation_index.valuation_dates == [
+        to_month_day(date(2022, 1, 1)),
+        to_month_day(date(2022, 2, 1)),
+        to_month_day(date(2022, 3, 1)),
+    ]
+    assert valuation_index.prices == [Decimal(1), Decimal(2), Decimal(3)]
+
+
+def test_join_asof() -> None:
+    valuation_index = ValuationIndex.from_company_valuations([
+        CompanyValuation(price=1.0, valuation_date=date(2022, 1, 10)),
+        CompanyValuation(price=2.0, valuation_date=date(2022, 2, 3)),
+        CompanyValuation(price=3.0, valuation_date=date(2022, 2, 4)),
+        CompanyValuation(price=4.0, valuation_date=date(2022, 2, 20)),
+        CompanyValuation(price=5.0, valuation_date=date(2022, 4, 1)),
+    ])
+    timeline_dates = [
+        to_month_day(date(2022, 1, 1)),
+        to_month_day(date(2022, 2, 1)),
+        to_month_day(date(2022, 3, 1)),
+        to_month_day(date(2022, 4, 1)),
+        to_month_day(date(2022, 5, 1)),
+    ]
+
+    assert [
+        valuation_idx for _, valuation_idx in join_asof(timeline_dates, valuation_index)
+    ] == [-1, 0, 3, 4, 4]
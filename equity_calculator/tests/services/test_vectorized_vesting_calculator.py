@@ -0,0 +1,131 @@
+from datetime import date
+
+import pytest
+from app.schemas import OptionGrant
+from app.services.month_calendar import to_month_day
+from app.services.vectorized_vesting_calculator import (form_period_vesting_timeline,
+                                                        form_vectorized_vesting_schedule)
+from app.services.vesting_calculator import (form_dense_monthly_vesting_timeline,
+                                             form_month_day_vesting_schedule,
+                                             form_vesting_schedule)
+
+
+@pytest.mark.parametrize(
+    'option_grants',
+    [
+        [
+            OptionGrant(quantity=10, start_date='14-01-2022', cliff_months=0, duration_months=4),
+            OptionGrant(quantity=6, start_date='14-02-2022', cliff_months=2, duration_months=6),
+            OptionGrant(quantity=2, start_date='14-03-2022', cliff_months=0, duration_months=2),
+        ],
+        [
+            OptionGrant(quantity=6, start_date='31-10-2021', cliff_months=3, duration_months=6),
+            OptionGrant(quantity=7, start_date='29-01-2020', cliff_months=1, duration_months=49),
+            OptionGrant(quantity=4, start_date='30-12-2019', cliff_months=4, duration_months=4),
+        ],
+        [
+            OptionGrant(quantity=3, start_date='01-01-2022', cliff_months=0, duration_months=600),
+            OptionGrant(quantity=10, start_date='01-01-2022', cliff_months=12, duration_months=60),
+        ],
+    ],
+)
+def test_form_vectorized_vesting_schedule_same_as_python_engine(
+    option_grants: list[OptionGrant],
+) -> None:
+    vesting_schedule = form_vectorized_vesting_schedule(option_grants)
+
+    assert vesting_schedule == form_vesting_schedule(option_grants)
+    assert all(type(quantity) is int for quantity in vesting_schedule.values())
+
+
+def test_form_vectorized_vesting_schedule_quantity_overflowing_int64() -> None:
+    option_grant = OptionGrant(
+        quantity=2 ** 62 + 1,
+        start_date='01-01-2022',
+        cliff_months=1,
+        duration_months=3,
+    )
+    vesting_schedule = form_vectorized_vesting_schedule([option_grant])
+
+    assert vesting_schedule == form_vesting_schedule([option_grant])
+    assert sum(vesting_schedule.values()) == 2 ** 62 + 1
+
+
+def test_form_vectorized_vesting_schedule_no_grants() -> None:
+    assert form_vectorized_vesting_schedule([]) == {}
+
+
+def test_form_vectorized_vesting_schedule_dates() -> None:
+    option_grant = OptionGrant(
+        quantity=4,
+        start_date='31-12-2023',
+        cliff_months=0,
+        duration_months=2,
+    )
+
+    assert form_vectorized_vesting_schedule([option_grant]) == {
+        date(2024, 1, 31): 2,
+        date(2024, 2, 29): 2,
+    }
+
+
+def test_form_period_vesting_timeline_monthly_same_as_dense_timeline() -> None:
+    option_grants = [
+        OptionGrant(quantity=12, start_date='10-12-2021', cliff_months=0, duration_months=3),
+        OptionGrant(quantity=1, start_date='03-02-2022', cliff_months=1, duration_months=1),
+        OptionGrant(quantity=100, start_date='31-01-2021', cliff_months=6, duration_months=13),
+    ]
+    vesting_schedule = form_month_day_vesting_schedule(option_grants)
+    start_date, end_date = to_month_day(date(2021, 1, 31)), max(vesting_schedule)
+    vesting_timeline = form_dense_monthly_vesting_timeline(vesting_schedule, start_date, end_date)
+
+    assert form_period_vesting_timeline(vesting_schedule, start_date, end_date, 'monthly') == (
+        list(vesting_timeline.month_days()), vesting_timeline.vested_quantities,
+    )
+
+
+def test_form_period_vesting_timeline_quarterly() -> None:
+    vesting_schedule = {
+        to_month_day(date(2022, 2, 10)): 1,
+        to_month_day(date(2022, 4, 1)): 2,
+        to_month_day(date(2022, 8, 20)): 4,
+        to_month_day(date(2022, 9, 15)): 8,
+        to_month_day(date(2022, 9, 20)): 16,
+    }
+
+    assert form_period_vesting_timeline(
+        vesting_schedule,
+        to_month_day(date(2022, 2, 10)), to_month_day(date(2022, 9, 20)),
+        'quarterly',
+    ) == (
+        [
+            to_month_day(date(2022, 2, 10)),
+            to_month_day(date(2022, 4, 1)),
+            to_month_day(date(2022, 7, 1)),
+            to_month_day(date(2022, 9, 20)),
+            to_month_day(date(2022, 10, 1)),
+        ],
+        [1, 2, 0, 16, 12],
+    )
+
+
+def test_form_period_vesting_timeline_weekly() -> None:
+    # 2022-01-03 and 2022-01-10 are Mondays
+    vesting_schedule = {
+        to_month_day(date(2022, 1, 1)): 1,
+        to_month_day(date(2022, 1, 4)): 2,
+        to_month_day(date(2022, 1, 10)): 4,
+    }
+
+    assert form_period_vesting_timeline(
+        vesting_schedule,
+        to_month_day(date(2022, 1, 1)), to_month_day(date(2022, 1, 10)),
+        'weekly',
+    ) == (
+        [
+            to_month_day(date(2022, 1, 1)),
+            to_month_day(date(2022, 1, 3)),
+            to_month_day(date(2022, 1, 10)),
+        ],
+        [1, 0, 6],
+    )
@@ -3,9 +3,15 @@ from decimal import Decimal
 
 import pytest
 from app.schemas import CompanyValuation, OptionGrant
-from app.services.vesting_calculator import (form_monthly_vesting_timeline,
+from app.services.cache import vesting_template_cache
+from app.services.month_calendar import to_month_day
+from app.services.vesting_calculator import (TimelineWindow, VestingTimeline,
+                                             form_dense_monthly_vesting_timeline,
+                                             form_monthly_vesting_timeline,
                                              form_valuated_vesting_schedule,
-                                             form_vesting_schedule)
+                                             form_vesting_schedule, form_windowed_vesting_timeline,
+                                             get_valuated_runs, get_valuated_timeline,
+                                             get_valuated_timeline_page, get_vested_values_asof)
 
 
 def test_form_vesting_schedule_without_cliff() -> None:
@@ -122,6 +128,21 @@ def test_form_vesting_schedule_monthly_vest_is_periodic() -> None:
     }
 
 
+def test_form_vesting_schedule_long_grant_vests_whole_quantity() -> None:
+    option_grant = OptionGrant(
+        quantity=10 ** 15 + 7,
+        start_date='31-01-2000',
+        cliff_months=13,
+        duration_months=600,
+    )
+    vesting_schedule = form_vesting_schedule([option_grant])
+
+    assert len(vesting_schedule) == 600 - 13 + 1
+    assert vesting_schedule[date(2001, 2, 28)] == (10 ** 15 + 7) * 13 // 600
+    assert vesting_schedule[date(2050, 1, 31)] == (10 ** 15 + 7) - (10 ** 15 + 7) * 599 // 600
+    assert sum(vesting_schedule.values()) == 10 ** 15 + 7
+
+
 def test_form_vesting_schedule_multiple_grants_different_day() -> None:
     option_grants = [
         OptionGrant(
@@ -183,6 +204,58 @@ def test_form_vesting_schedule_multiple_grants_same_day() -> None:
     }
 
 
+def test_form_vesting_schedule_template_is_memoized() -> None:
+    option_grant = OptionGrant(
+        quantity=7,
+        start_date='13-07-1999',
+        cliff_months=1,
+        duration_months=7,
+    )
+    form_vesting_schedule([option_grant])
+    hits_before = vesting_template_cache.stats.hits
+
+    vesting_schedule = form_vesting_schedule([option_grant, option_grant])
+
+    assert vesting_template_cache.stats.hits == hits_before + 2
+    assert vesting_schedule == {date(1999, month, 13): 2 for month in range(8, 12 + 1)} | {
+        date(2000, 1, 13): 2,
+        date(2000, 2, 13): 2,
+    }
+
+
+def test_form_vesting_schedule_grants_of_same_shape_share_template() -> None:
+    option_grants = [
+        OptionGrant(
+            quantity=5,
+            start_date='30-11-1998',
+            cliff_months=2,
+            duration_months=5,
+        ),
+        OptionGrant(
+            quantity=5,
+            start_date='03-12-1998',
+            cliff_months=2,
+            duration_months=5,
+        ),
+    ]
+    vesting_template_stats_before = vesting_template_cache.stats
+
+    vesting_schedule = form_vesting_schedule(option_grants)
+
+    assert vesting_template_cache.stats.misses == vesting_template_stats_before.misses + 1
+    assert vesting_template_cache.stats.hits == vesting_template_stats_before.hits + 1
+    assert vesting_schedule == {
+        date(1999, 1, 30): 2,
+        date(1999, 2, 3): 2,
+        date(1999, 2, 28): 1,
+        date(1999, 3, 3): 1,
+        date(1999, 3, 30): 1,
+        date(1999, 4, 3): 1,
+        date(1999, 4, 30): 1,
+        date(1999, 5, 3): 1,
+    }
+
+
 def test_form_monthly_vesting_timeline():
     vesting_schedule = {
         date(2022, 1, 6): 1,
@@ -290,6 +363,66 @@ def test_form_monthly_vesting_timeline_empty_months():
     }
 
 
+def test_form_monthly_vesting_timeline_vested_in_end_month_before_end_date():
+    vesting_schedule = {
+        date(2022, 2, 5): 1,
+        date(2022, 3, 3): 2,
+        date(2022, 3, 10): 4,
+    }
+    start_date = date(2022, 1, 10)
+    end_date = date(2022, 3, 10)
+
+    monthly_schedule = form_monthly_vesting_timeline(
+        vesting_schedule, start_date, end_date
+    )
+
+    assert list(monthly_schedule.items()) == [
+        (date(2022, 1, 10), 0),
+        (date(2022, 2, 1), 0),
+        (date(2022, 3, 1), 1),
+        (date(2022, 3, 10), 4),
+        (date(2022, 4, 1), 2),
+    ]
+
+
+def test_form_dense_monthly_vesting_timeline():
+    vesting_schedule = {
+        to_month_day(date(2022, 1, 6)): 1,
+        to_month_day(date(2022, 2, 1)): 2,
+        to_month_day(date(2022, 3, 9)): 5,
+        to_month_day(date(2022, 4, 5)): 4,
+    }
+    start_date = to_month_day(date(2022, 1, 5))
+    end_date = to_month_day(date(2022, 4, 5))
+
+    vesting_timeline = form_dense_monthly_vesting_timeline(
+        vesting_schedule, start_date, end_date
+    )
+
+    assert vesting_timeline == VestingTimeline(start_date, end_date, [0, 3, 0, 5, 4])
+    assert list(vesting_timeline.month_days()) == [
+        to_month_day(date(2022, 1, 5)),
+        to_month_day(date(2022, 2, 1)),
+        to_month_day(date(2022, 3, 1)),
+        to_month_day(date(2022, 4, 1)),
+        to_month_day(date(2022, 4, 5)),
+    ]
+
+
+def test_form_dense_monthly_vesting_timeline_single_date():
+    vesting_schedule = {
+        to_month_day(date(2022, 1, 5)): 7,
+    }
+    start_date = end_date = to_month_day(date(2022, 1, 5))
+
+    vesting_timeline = form_dense_monthly_vesting_timeline(
+        vesting_schedule, start_date, end_date
+    )
+
+    assert vesting_timeline == VestingTimeline(start_date, end_date, [7])
+    assert list(vesting_timeline.month_days()) == [start_date]
+
+
 def test_form_valuated_vesting_schedule():
     vesting_schedule = {
         date(2022, 1, 1): 1,
@@ -429,6 +562,45 @@ def test_form_valuated_vesting_schedule_valuation_on_timeline_date():
     ]
 
 
+def test_form_valuated_vesting_schedule_several_valuations_between_dates():
+    vesting_schedule = {
+        date(2022, 1, 1): 1,
+        date(2022, 2, 1): 1,
+        date(2022, 3, 1): 1,
+    }
+
+    company_valuations = [
+        CompanyValuation(
+            price=1.0,
+            valuation_date=date(2021, 11, 1),
+        ),
+        CompanyValuation(
+            price=10.0,
+            valuation_date=date(2021, 12, 1),
+        ),
+        CompanyValuation(
+            price=20.0,
+            valuation_date=date(2022, 1, 5),
+        ),
+        CompanyValuation(
+            price=30.0,
+            valuation_date=date(2022, 1, 25),
+        ),
+    ]
+
+    valuated_schedule = form_valuated_vesting_schedule(
+        vesting_schedule, company_valuations
+    )
+
+    result_dict = [dict(v) for v in valuated_schedule]
+
+    assert result_dict == [
+        {'total_value': 10.0, 'date_': date(2022, 1, 1)},
+        {'total_value': 60.0, 'date_': date(2022, 2, 1)},
+        {'total_value': 90.0, 'date_': date(2022, 3, 1)},
+    ]
+
+
 def test_form_valuated_vesting_schedule_valuation_outside_period():
     vesting_schedule = {
         date(2022, 1, 1): 1,
@@ -518,3 +690,187 @@ def test_form_valuated_vesting_schedule_decimal_price():
         {'total_value': Decimal('0.357582') * 3, 'date_': date(2022, 2, 1)},
         {'total_value': Decimal('0.357582') * 4, 'date_': date(2022, 3, 1)},
     ]
+
+
+def test_get_vested_values_asof():
+    option_grants = [
+        OptionGrant(quantity=400, start_date=date(2022, 1, 15), cliff_months=2, duration_months=4),
+        OptionGrant(quantity=100, start_date=date(2022, 2, 1), cliff_months=0, duration_months=1),
+    ]
+    company_valuations = [
+        CompanyValuation(price=10.0, valuation_date=date(2022, 1, 1)),
+        CompanyValuation(price=15.0, valuation_date=date(2022, 4, 1)),
+    ]
+
+    vested_values = get_vested_values_asof(
+        option_grants,
+        company_valuations,
+        [date(2022, 6, 1), date(2022, 1, 1), date(2022, 3, 14), date(2022, 3, 15)],
+    )
+
+    assert vested_values.dates == [
+        date(2022, 6, 1), date(2022, 1, 1), date(2022, 3, 14), date(2022, 3, 15),
+    ]
+    assert vested_values.total_values == [7500, 0, 1000, 3000]
+
+
+def test_get_vested_values_asof_matches_timeline():
+    option_grants = [
+        OptionGrant(
+            quantity=1000, start_date=date(2020, 1, 31), cliff_months=12, duration_months=48,
+        ),
+        OptionGrant(quantity=77, start_date=date(2021, 6, 10), cliff_months=0, duration_months=7),
+    ]
+    company_valuations = [
+        CompanyValuation(price=Decimal('1.5'), valuation_date=date(2020, 1, 1)),
+        CompanyValuation(price=Decimal('2.25'), valuation_date=date(2021, 7, 20)),
+    ]
+
+    valuated_timeline = get_valuated_timeline(option_grants, company_valuations)
+    vested_values = get_vested_values_asof(
+        option_grants, company_valuations, valuated_timeline.dates,
+    )
+
+    assert vested_values == valuated_timeline
+
+
+def test_get_vested_values_asof_unknown_stock_price():
+    option_grants = [
+        OptionGrant(quantity=400, start_date=date(2022, 1, 1), cliff_months=2, duration_months=4),
+    ]
+    company_valuations = [
+        CompanyValuation(price=10.0, valuation_date=date(2022, 1, 1)),
+    ]
+
+    with pytest.raises(ValueError):
+        get_vested_values_asof(option_grants, company_valuations, [date(2021, 12, 31)])
+
+
+def test_form_windowed_vesting_timeline():
+    option_grants = [
+        OptionGrant(quantity=12, start_date=date(2021, 12, 10), cliff_months=0, duration_months=3),
+        OptionGrant(quantity=1, start_date=date(2022, 2, 3), cliff_months=1, duration_months=1),
+    ]
+
+    windowed_timeline = form_windowed_vesting_timeline(
+        option_grants, to_month_day(date(2022, 2, 15)), to_month_day(date(2022, 3, 10)),
+    )
+
+    # Vests before the window are on its first point, the vest of 03-03
+    # is accumulated on the point after the end date out of the window
+    assert list(windowed_timeline.month_days()) == [
+        to_month_day(date(2022, 3, 1)),
+        to_month_day(date(2022, 3, 10)),
+    ]
+    assert windowed_timeline.vested_quantities == [8, 4]
+
+
+def test_get_valuated_timeline_within_window():
+    option_grants = [
+        OptionGrant(quantity=12, start_date=date(2021, 12, 10), cliff_months=0, duration_months=3),
+        OptionGrant(quantity=1, start_date=date(2022, 2, 3), cliff_months=1, duration_months=1),
+        OptionGrant(quantity=100, start_date=date(2021, 1, 31), cliff_months=6, duration_months=13),
+    ]
+    company_valuations = [
+        CompanyValuation(price=Decimal('1.5'), valuation_date=date(2021, 1, 1)),
+        CompanyValuation(price=Decimal('2.25'), valuation_date=date(2021, 11, 15)),
+    ]
+    valuated_timeline = get_valuated_timeline(option_grants, company_valuations)
+    timeline_points = list(zip(*valuated_timeline))
+
+    for from_date, to_date in [
+        (None, None),
+        (date(2021, 8, 1), None),
+        (None, date(2021, 12, 31)),
+        (date(2021, 12, 10), date(2022, 3, 10)),
+        (date(2022, 3, 2), date(2022, 3, 2)),
+        (date(2022, 3, 11), None),
+        (date(2020, 1, 1), date(2021, 1, 30)),
+    ]:
+        windowed_timeline = get_valuated_timeline(
+            option_grants, company_valuations, TimelineWindow(from_date, to_date),
+        )
+
+        assert list(zip(*windowed_timeline)) == [
+            (timeline_date, total_value)
+            for timeline_date, total_value in timeline_points
+            if (from_date is None or timeline_date >= from_date)
+            and (to_date is None or timeline_date <= to_date)
+        ]
+
+
+def test_get_valuated_timeline_of_granularity_within_window():
+    option_grants = [
+        OptionGrant(quantity=12, start_date=date(2021, 12, 10), cliff_months=0, duration_months=3),
+        OptionGrant(quantity=100, start_date=date(2021, 1, 31), cliff_months=6, duration_months=13),
+    ]
+    company_valuations = [
+        CompanyValuation(price=Decimal('1.5'), valuation_date=date(2021, 1, 1)),
+        CompanyValuation(price=Decimal('2.25'), valuation_date=date(2021, 11, 15)),
+    ]
+    window = TimelineWindow(date(2021, 8, 15), date(2022, 2, 1))
+
+    valuated_timeline = get_valuated_timeline(
+        option_grants, company_valuations, granularity='weekly',
+    )
+    windowed_timeline = get_valuated_timeline(
+        option_grants, company_valuations, window, granularity='weekly',
+    )
+
+    assert windowed_timeline.dates[0] == date(2021, 8, 16)
+    assert list(zip(*windowed_timeline)) == [
+        (timeline_date, total_value)
+        for timeline_date, total_value in zip(*valuated_timeline)
+        if window.from_date <= timeline_date <= window.to_date
+    ]
+
+
+@pytest.mark.parametrize('window', [None, TimelineWindow(date(2021, 8, 15), date(2022, 3, 1))])
+def test_get_valuated_timeline_pages(window):
+    option_grants = [
+        OptionGrant(quantity=12, start_date=date(2021, 12, 10), cliff_months=0, duration_months=3),
+        OptionGrant(quantity=100, start_date=date(2021, 1, 31), cliff_months=6, duration_months=13),
+    ]
+    company_valuations = [
+        CompanyValuation(price=Decimal('1.5'), valuation_date=date(2021, 1, 1)),
+        CompanyValuation(price=Decimal('2.25'), valuation_date=date(2021, 11, 15)),
+    ]
+    valuated_timeline = get_valuated_timeline(option_grants, company_valuations, window)
+
+    dates, total_values, cursor = [], [], None
+
+    while True:
+        valuated_timeline_page, cursor = get_valuated_timeline_page(
+            option_grants, company_valuations, 4, cursor, window,
+        )
+        dates.extend(valuated_timeline_page.dates)
+        total_values.extend(valuated_timeline_page.total_values)
+
+        if cursor is None:
+            break
+
+        assert len(valuated_timeline_page.dates) == 4
+
+    assert (dates, total_values) == valuated_timeline
+
+
+def test_get_valuated_runs():
+    option_grants = [
+        OptionGrant(quantity=2, start_date=date(2022, 1, 1), cliff_months=3, duration_months=4),
+        OptionGrant(quantity=2, start_date=date(2022, 1, 1), cliff_months=0, duration_months=12),
+    ]
+    company_valuations = [
+        CompanyValuation(price=Decimal('10'), valuation_date=date(2021, 12, 1)),
+        # Price change of the unvested grants doesn't break the run
+        CompanyValuation(price=Decimal('20'), valuation_date=date(2022, 2, 15)),
+    ]
+
+    valuated_runs = get_valuated_runs(option_grants, company_valuations)
+
+    assert list(zip(*valuated_runs)) == [
+        (date(2022, 1, 1), date(2022, 3, 1), 0),
+        (date(2022, 4, 1), date(2022, 4, 1), 20),
+        (date(2022, 5, 1), date(2022, 6, 1), 40),
+        (date(2022, 7, 1), date(2022, 12, 1), 60),
+        (date(2023, 1, 1), date(2023, 1, 1), 80),
+    ]